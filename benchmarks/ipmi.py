@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+# Time per temperature read against the simulated BMC in tests/bmc.py: the native rmcp+ session
+# (first read with handshake and SDR walk, then steady state) versus one ipmitool process per read.
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, "tests"))
+import bmc  # noqa: E402
+from hush.interfaces import rmcp  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def native(port: int, runs: int) -> dict:
+    session = rmcp.Session("127.0.0.1", bmc.USERNAME, bmc.PASSWORD, port=port)
+    try:
+        start = time.perf_counter()
+        await session.sdr(sensor_type=rmcp.SENSOR_TYPE_TEMPERATURE)
+        first = time.perf_counter() - start
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await session.sdr(sensor_type=rmcp.SENSOR_TYPE_TEMPERATURE)
+            samples.append(time.perf_counter() - start)
+    finally:
+        await session.close()
+    return {"first_ms": first * 1000, "read_ms": statistics.median(samples) * 1000}
+
+
+def ipmitool(path: str, port: int, runs: int) -> dict:
+    command = [path, "-I", "lanplus", "-C", "3", "-H", "127.0.0.1", "-p", str(port), "-U", bmc.USERNAME, "-P", bmc.PASSWORD, "-c", "sdr", "type", "Temperature"]
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return {"read_ms": statistics.median(samples) * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Native rmcp+ sdr reads versus ipmitool against a simulated BMC.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--ipmitool", default=shutil.which("ipmitool"))
+    args = parser.parse_args()
+    port = free_port()
+    simulator = subprocess.Popen([sys.executable, bmc.__file__, str(port)])
+    try:
+        time.sleep(1)
+        result = asyncio.run(native(port, args.runs))
+        print(f"native rmcp+: first read {result['first_ms']:.1f} ms, then {result['read_ms']:.1f} ms per read")
+        if args.ipmitool is None:
+            print("ipmitool: not found, pass --ipmitool to compare")
+        else:
+            result = ipmitool(args.ipmitool, port, args.runs)
+            print(f"ipmitool: {result['read_ms']:.1f} ms per read")
+    finally:
+        simulator.kill()
+        simulator.wait()
+
+
+if __name__ == "__main__":
+    main()
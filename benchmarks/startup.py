@@ -0,0 +1,51 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Measures cold import cost in fresh interpreters: the modules main.py loads before the launcher starts,
+# then one vendor driver class as Factory resolves it, and whether numpy has really been executed by then.
+PROBE = """
+import importlib, json, sys, time
+sys.path.insert(0, {repo!r})
+start = time.perf_counter()
+import hush.page, hush.control, hush.hardware.factory
+startup = time.perf_counter() - start
+start = time.perf_counter()
+getattr(importlib.import_module("hush.hardware.{module}"), "{cls}")
+driver = time.perf_counter() - start
+numpy = "numpy" in sys.modules and type(sys.modules["numpy"]).__name__ == "module"
+print(json.dumps({{"startup": startup, "driver": driver, "numpy": numpy}}))
+"""
+
+
+def measure(repo: str, module: str, cls: str, runs: int) -> dict:
+    samples = []
+    with tempfile.TemporaryDirectory() as storage:
+        env = dict(os.environ, NICEGUI_STORAGE_PATH=storage)
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", PROBE.format(repo=repo, module=module, cls=cls)], capture_output=True, text=True, cwd=storage, env=env, check=True)
+            samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        "startup_ms": statistics.median(s["startup"] for s in samples) * 1000,
+        "driver_ms": statistics.median(s["driver"] for s in samples) * 1000,
+        "numpy_loaded": any(s["numpy"] for s in samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold import time of hush at startup and on first driver use.")
+    parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--module", default="idrac")
+    parser.add_argument("--cls", default="Redfish")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+    result = measure(os.path.abspath(args.repo), args.module, args.cls, args.runs)
+    print(f"startup imports: {result['startup_ms']:.0f} ms, hush.hardware.{args.module}.{args.cls}: {result['driver_ms']:.1f} ms, numpy executed: {result['numpy_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import logging
+
+logger = logging.getLogger(__name__)
+from typing import ClassVar, Dict, List, Tuple
+from dataclasses import dataclass
+import random
+import time
+
+
+@dataclass(kw_only=False, eq=False)
+class Breaker:
+    host: str
+    driver: str
+    state: str = "closed"
+    failures: int = 0
+    trips: int = 0
+    retry_at: float = 0.0
+    threshold: ClassVar[int] = 3
+    base_backoff: ClassVar[float] = 30
+    max_backoff: ClassVar[float] = 900
+    breakers: ClassVar[Dict[Tuple[str, str], "Breaker"]] = {}
+
+    @classmethod
+    def get(cls, host: str, driver: str) -> "Breaker":
+        if (host, driver) not in cls.breakers:
+            cls.breakers[(host, driver)] = cls(host=host, driver=driver)
+        return cls.breakers[(host, driver)]
+
+    @classmethod
+    def clear(cls, host: str) -> None:
+        for key in [key for key in cls.breakers if key[0] == host]:
+            del cls.breakers[key]
+
+    @classmethod
+    def describe(cls, host: str) -> List[str]:
+        now = time.monotonic()
+        descriptions = []
+        for breaker in cls.breakers.values():
+            if breaker.host == host:
+                if breaker.state == "open":
+                    descriptions.append(f"{breaker.driver} unreachable, retrying in {max(0, int(breaker.retry_at - now))}s")
+                elif breaker.state == "half-open":
+                    descriptions.append(f"{breaker.driver} unreachable, probing")
+        return descriptions
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() < self.retry_at:
+                return False
+            self.state = "half-open"
+            logger.info(f"{self.host} {self.driver} circuit half-open.")
+        return True
+
+    def success(self) -> None:
+        if self.state != "closed":
+            logger.warning(f"{self.host} {self.driver} circuit closed.")
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.threshold:
+            self.trips += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+            backoff = random.uniform(backoff / 2, backoff)
+            self.state = "open"
+            self.retry_at = time.monotonic() + backoff
+            logger.warning(f"{self.host} {self.driver} circuit open after {self.failures} failures, retrying in {backoff:.0f}s.")
@@ -1,147 +1,337 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 import asyncio
-import numpy as np
-from scipy.interpolate import interp1d
-import math
-from datetime import datetime as dt
-from datetime import timedelta
-from simple_pid import PID
-from ha_mqtt_discoverable import Settings, DeviceInfo
-from ha_mqtt_discoverable.sensors import Sensor, SensorInfo
-from hush import storage
+import contextlib
+import time
+from dataclasses import dataclass
+from hush import hardware, lazy, storage
+from hush.breaker import Breaker
+from hush.scheduler import Scheduler
 from hush.hardware.factory import Factory
 from hush.tabs.monitor import FanSpeeds, Status
 
+if TYPE_CHECKING:
+    from simple_pid import PID
+
+np = lazy.module("numpy")
+
 
 class Launcher:
-    def __init__(self) -> None:
-        self.times: dict = {}
-        self.busy: bool = False
+    def __init__(self, max_concurrency: int = 16) -> None:
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        Scheduler.reschedule_all()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
 
     async def run(self) -> None:
-        self.busy = True
-        hosts = list(storage.hosts.keys())
-        for host in hosts:
-            if storage.host(host).get("speed", "") != "Shared":
-                delay = storage.host(host).get("delay", 30)
-                if host not in self.times:
-                    elapsed_time = timedelta(seconds=delay)
-                else:
-                    elapsed_time = dt.now() - self.times[host]
-                shared_speed_hosts = []
-                for h in hosts:
-                    if storage.host(h).get("speed", "") == "Shared" and host == storage.host(h)["shared"].get("speed", ""):
-                        shared_speed_hosts.append(h)
-                if delay is not None and delay > 0 and elapsed_time.seconds >= delay:
-                    machine = Machine(host=host, shared_speed_hosts=shared_speed_hosts)
-                    await machine.run()
-                    self.times[host] = dt.now()
-        self.busy = False
+        while True:
+            for host, deadline in await Scheduler.due():
+                if host in self.tasks:
+                    continue
+                self.tasks[host] = asyncio.create_task(self._run_host(host, deadline, storage.dependents(host)))
+
+    async def _run_host(self, host: str, deadline: float, shared_speed_hosts: List[str]) -> None:
+        interval = None
+        try:
+            async with self._semaphore:
+                machine = Machine(host=host, shared_speed_hosts=shared_speed_hosts)
+                interval = await machine.run()
+        finally:
+            del self.tasks[host]
+            Scheduler.completed(host, deadline, interval)
+
+    @property
+    def busy(self) -> bool:
+        return len(self.tasks) > 0
 
     async def wait_on_not_busy(self) -> None:
         while self.busy is True:
             await asyncio.sleep(0.5)
 
 
+@dataclass(frozen=True)
+class Read:
+    host: str
+    sensor: str
+    driver: hardware.Device
+    breaker: Optional[Breaker] = None
+    algorithm: Any = None
+    sink: Any = None
+    interval: float = 0
+
+
+@dataclass(frozen=True)
+class Plan:
+    key: Tuple
+    hosts: Tuple[str, ...]
+    control: Optional[hardware.Device]
+    control_breaker: Optional[Breaker]
+    reads: Tuple[Read, ...]
+    breakers: Tuple[Tuple[Breaker, hardware.Device], ...]
+    speed_sink: Any = None
+    skipped: Tuple[Tuple[str, str], ...] = ()
+
+
 class Machine:
+    sensor_timeout: float = 30
+    sensors: Tuple[str, ...] = ("cpu", "pci", "drive", "gpu", "chassis")
+    sensor_names: Dict[str, str] = {
+        "cpu": "CPU Temperature",
+        "pci": "PCI Temperature",
+        "drive": "Drive Temperature",
+        "gpu": "GPU Temperature",
+        "chassis": "Chassis Temperature",
+    }
+    plans: Dict[str, Plan] = {}
+    speeds: Dict[str, Tuple[Any, Any]] = {}
+    readings: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
     def __init__(self, host: str, shared_speed_hosts: List[str]) -> None:
         self._host = host
         self._shared_speed_hosts = shared_speed_hosts
+        self._hosts = [h for h in shared_speed_hosts + [host] if h]
 
-    async def run(self):
+    async def run(self) -> Optional[float]:
         try:
-            await self._calc()
+            plan = await self._plan()
+            admitted = None if plan is None else await self._admit(plan)
+            if admitted is not None:
+                reads = tuple(read for read in plan.reads if read.breaker is None or read.breaker in admitted)
+                interval = await self._calc(plan, reads, partial=len(reads) < len(plan.reads) or len(plan.skipped) > 0)
+                for breaker in admitted:
+                    breaker.success()
+                return interval
+            else:
+                for host in self._hosts:
+                    status = Status(host=host)
+                    status.submit()
         except Exception as e:
             status = Status(host=self._host)
             status.submit()
             logger.error(f"Connection to {self._host} failed!")
             logger.error(f"{self._host}'s config={storage.host(self._host)}!")
             logger.exception(e)
+        return None
+
+    def _breaker(self, host: str, group: str) -> Optional[Breaker]:
+        host, name = Factory.resolve(host, group)
+        if name == "None":
+            return None
+        return Breaker.get(host, name)
+
+    async def _plan(self) -> Optional[Plan]:
+        key = tuple((host, storage.version(host)) for host in self._hosts)
+        plan = self.plans.get(self._host, None)
+        # Sensor groups left out of the plan because their driver failed are retried once their breaker allows it again.
+        if plan is None or plan.key != key or any(self._breaker(host, group).allow() for host, group in plan.skipped):
+            control_breaker = self._breaker(self._host, "speed")
+            if control_breaker is not None and control_breaker.allow() is False:
+                return None
+            plan = await self._compile(key)
+            self.plans[self._host] = plan
+        return plan
+
+    async def _driver(self, host: str, group: str) -> Optional[hardware.Device]:
+        try:
+            return await Factory.driver(host, group)
+        except Exception as e:
+            breaker = self._breaker(host, group)
+            if breaker is not None:
+                breaker.failure()
+            raise e
+
+    async def _compile(self, key: Tuple) -> Plan:
+        mqtt_settings = None
+        mqtt_device_info = None
+        mqtt = storage.host(self._host).get("mqtt", {})
+        if mqtt.get("hostname", "") != "" and mqtt.get("username", "") != "" and mqtt.get("password", "") != "":
+            from ha_mqtt_discoverable import Settings, DeviceInfo
+            from ha_mqtt_discoverable.sensors import Sensor, SensorInfo
+
+            mqtt_settings = Settings.MQTT(host=mqtt["hostname"], username=mqtt["username"], password=mqtt["password"])
+            mqtt_device_info = DeviceInfo(name=self._host, identifiers=self._host)
+        control = await self._driver(self._host, "speed")
+        control_breaker = self._breaker(self._host, "speed") if control is not None else None
+        breakers = {}
+        if control_breaker is not None:
+            breakers[control_breaker] = control
+        reads = []
+        skipped = []
+        for host in self._hosts:
+            for sensor in self.sensors:
+                self.readings.pop((host, sensor), None)
+                breaker = self._breaker(host, sensor)
+                if breaker is not None and breaker.allow() is False:
+                    skipped.append((host, sensor))
+                    continue
+                try:
+                    driver = await self._driver(host, sensor)
+                except Exception as e:
+                    if breaker is None:
+                        raise e
+                    logger.error(f"{host} {sensor} driver unavailable, continuing without it.")
+                    logger.exception(e)
+                    skipped.append((host, sensor))
+                    continue
+                if driver:
+                    breaker = self._breaker(host, sensor)
+                    if breaker is not None and breaker not in breakers:
+                        breakers[breaker] = driver
+                    algorithm = None
+                    if control is not None:
+                        if storage.algo_sensor(host, sensor)["type"] == "pid":
+                            algorithm = Pid(host, sensor).controller
+                        else:
+                            algorithm = Curve(host, sensor)
+                    sink = None
+                    if mqtt_settings is not None:
+                        mqtt_sensor_info = SensorInfo(
+                            name=self.sensor_names[sensor],
+                            device_class="temperature",
+                            unique_id=f"hush_{host.replace(' ','_')}_{sensor}_temperature",
+                            unit_of_measurement="°C",
+                            device=mqtt_device_info,
+                        )
+                        sink = Sensor(Settings(mqtt=mqtt_settings, entity=mqtt_sensor_info))
+                    interval = float(storage.interval(host, sensor) or 0)
+                    reads.append(Read(host=host, sensor=sensor, driver=driver, breaker=breaker, algorithm=algorithm, sink=sink, interval=interval))
+        speed_sink = None
+        if mqtt_settings is not None and control is not None:
+            unit_of_measurement = "%"
+            for read in reads:
+                if isinstance(read.algorithm, Curve) and read.algorithm.modal is True:
+                    unit_of_measurement = None
+            mqtt_speed_info = SensorInfo(
+                name="Fan Speed", device_class=None, unique_id=f"hush_{self._host.replace(' ','_')}_fan_speed", unit_of_measurement=unit_of_measurement, device=mqtt_device_info
+            )
+            speed_sink = Sensor(Settings(mqtt=mqtt_settings, entity=mqtt_speed_info))
+        logger.info(f"{self._host} control plan compiled for {', '.join(self._hosts)}.")
+        return Plan(
+            key=key,
+            hosts=tuple(self._hosts),
+            control=control,
+            control_breaker=control_breaker,
+            reads=tuple(reads),
+            breakers=tuple(breakers.items()),
+            speed_sink=speed_sink,
+            skipped=tuple(skipped),
+        )
+
+    async def _admit(self, plan: Plan) -> Optional[List[Breaker]]:
+        # Only the speed controller's breaker blocks the cycle, sensors behind an open breaker are left out of it.
+        admitted = []
+        for breaker, driver in plan.breakers:
+            allowed = breaker.allow()
+            if allowed is True and breaker.state == "half-open" and await driver.probe() is False:
+                breaker.failure()
+                allowed = False
+            if allowed is True:
+                admitted.append(breaker)
+            elif breaker is plan.control_breaker:
+                return None
+        return admitted
+
+    async def _read(self, read: Read) -> Optional[float]:
+        key = (read.host, read.sensor)
+        reading = self.readings.get(key, None)
+        if reading is not None and time.monotonic() - reading[1] < read.interval:
+            return reading[0]
+        try:
+            temp = await asyncio.wait_for(read.driver.get_temp(), self.sensor_timeout)
+        except Exception as e:
+            self.readings.pop(key, None)
+            if read.breaker is not None:
+                read.breaker.failure()
+            raise e
+        if temp is not None:
+            self.readings[key] = (temp, time.monotonic())
+        return temp
 
-    async def _calc(self):
+    def _interval(self, plan: Plan) -> Optional[float]:
+        adaptive = storage.adaptive(self._host)
+        if adaptive.get("enabled", False) is False:
+            return None
+        minimum = float(adaptive.get("min", 10))
+        maximum = max(float(adaptive.get("max", 120)), minimum)
+        interval = maximum
+        for read in plan.reads:
+            reading = self.readings.get((read.host, read.sensor), None)
+            if reading is None:
+                continue
+            breakpoints = []
+            if isinstance(read.algorithm, Curve):
+                breakpoints = read.algorithm.temps
+            elif read.algorithm is not None:
+                breakpoints = [read.algorithm.setpoint]
+            interval = min(interval, Adaptive.interval((read.host, read.sensor), reading[0], reading[1], breakpoints, minimum, maximum))
+        return interval
+
+    async def _calc(self, plan: Plan, reads: Tuple[Read, ...], partial: bool = False) -> Optional[float]:
         highest_speed = None
         current_speed = None
         final_speed = None
         temperatures = {}
-        mqtt_active = False
-        if (
-            "mqtt" in storage.host(self._host)
-            and storage.host(self._host)["mqtt"].get("hostname", "") != ""
-            and storage.host(self._host)["mqtt"].get("username", "") != ""
-            and storage.host(self._host)["mqtt"].get("password", "") != ""
-        ):
-            mqtt_settings = Settings.MQTT(
-                host=storage.host(self._host)["mqtt"].get("hostname", ""),
-                username=storage.host(self._host)["mqtt"].get("username", ""),
-                password=storage.host(self._host)["mqtt"].get("password", ""),
-            )
-            mqtt_device_info = DeviceInfo(name=self._host, identifiers=self._host)
-            mqtt_active = True
-        control = await Factory.driver(self._host, "speed")
-        hosts = self._shared_speed_hosts
-        hosts.append(self._host)
-        for host in hosts:
-            if host:
-                for sensor in ["cpu", "pci", "drive", "gpu", "chassis"]:
-                    driver = await Factory.driver(host, sensor)
-                    if driver:
-                        meas_temp = await driver.get_temp()
-                        if mqtt_active:
-                            mqtt_names = {
-                                "cpu": "CPU Temperature",
-                                "pci": "PCI Temperature",
-                                "drive": "Drive Temperature",
-                                "gpu": "GPU Temperature",
-                                "chassis": "Chassis Temperature",
-                            }
-                            mqtt_sensor_info = SensorInfo(
-                                name=mqtt_names[sensor],
-                                device_class="temperature",
-                                unique_id=f"hush_{host.replace(' ','_')}_{sensor}_temperature",
-                                unit_of_measurement="°C",
-                                device=mqtt_device_info,
-                            )
-                            mqtt_sensor_settings = Settings(mqtt=mqtt_settings, entity=mqtt_sensor_info)
-                            mqtt_sensor = Sensor(mqtt_sensor_settings)
-                            mqtt_sensor.set_state(meas_temp)
-                        temperatures[sensor] = meas_temp
-                        if control is not None:
-                            if storage.algo_sensor(host, sensor)["type"] == "pid":
-                                pid = Pid(host, sensor)
-                                speed = round(-1 * pid.controller(meas_temp))
-                                logger.debug(f"{host} Temperature={meas_temp} Speed={speed}")
-                            else:
-                                curve = Curve(host, sensor)
-                                speed = curve.calc(meas_temp)
-                                logger.debug(f"{host} Temperature={meas_temp} Speed={speed} Speeds={curve.speeds}")
-                        if speed is not None:
-                            if isinstance(speed, str) is True:
-                                current_speed = curve.speeds.index(speed)
-                            else:
-                                current_speed = speed
-                            if highest_speed is None or current_speed > highest_speed:
-                                highest_speed = current_speed
-                                if isinstance(speed, str) is True:
-                                    final_speed = curve.speeds[highest_speed]
-                                else:
-                                    final_speed = highest_speed
+        details = {}
+        control = plan.control
+        hosts = plan.hosts
+        results = await asyncio.gather(*[self._read(read) for read in reads], return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        for read, meas_temp in zip(reads, results):
+            if meas_temp is not None:
+                speed = None
+                if read.sink is not None:
+                    read.sink.set_state(meas_temp)
+                temperatures[read.sensor] = meas_temp
+                details.update(read.driver.details())
+                if isinstance(read.algorithm, Curve):
+                    speed = read.algorithm.calc(meas_temp)
+                    logger.debug(f"{read.host} Temperature={meas_temp} Speed={speed} Speeds={read.algorithm.speeds}")
+                elif read.algorithm is not None:
+                    speed = round(-1 * read.algorithm(meas_temp))
+                    logger.debug(f"{read.host} Temperature={meas_temp} Speed={speed}")
+                if speed is not None:
+                    if isinstance(speed, str) is True:
+                        current_speed = read.algorithm.speeds.index(speed)
+                    else:
+                        current_speed = speed
+                    if highest_speed is None or current_speed > highest_speed:
+                        highest_speed = current_speed
+                        if isinstance(speed, str) is True:
+                            final_speed = read.algorithm.speeds[highest_speed]
+                        else:
+                            final_speed = highest_speed
+        interval = self._interval(plan)
+        last = self.speeds.get(self._host, None)
+        if partial is True and final_speed is not None and last is not None and type(last[1]) is type(final_speed) and last[0] > highest_speed:
+            # A sensor is left out while its breaker is open, never ramp down on what the remaining ones report.
+            logger.info(f"{self._host} holding Fan Speed={last[1]} while sensors are unavailable.")
+            highest_speed, final_speed = last
         if final_speed is not None:
-            if mqtt_active:
-                unit_of_measurement = None
-                if isinstance(final_speed, int) or isinstance(final_speed, float):
-                    unit_of_measurement = "%"
-                mqtt_speed_info = SensorInfo(
-                    name="Fan Speed", device_class=None, unique_id=f"hush_{self._host.replace(' ','_')}_fan_speed", unit_of_measurement=unit_of_measurement, device=mqtt_device_info
-                )
-                mqtt_speed_settings = Settings(mqtt=mqtt_settings, entity=mqtt_speed_info)
-                mqtt_speed = Sensor(mqtt_speed_settings)
-                mqtt_speed.set_state(final_speed)
+            if plan.speed_sink is not None:
+                plan.speed_sink.set_state(final_speed)
             logger.info(f"{control.hostname} Fan Speed={final_speed}")
-            await control.set_speed(final_speed)
-            fan_speeds = await control.get_fan_speed()
+            try:
+                await control.set_speed(final_speed)
+                fan_speeds = await control.get_fan_speed()
+            except Exception as e:
+                if plan.control_breaker is not None:
+                    plan.control_breaker.failure()
+                raise e
+            self.speeds[self._host] = (highest_speed, final_speed)
             if fan_speeds:
                 for host in hosts:
                     fan_speed_status = FanSpeeds(host=host, speeds=fan_speeds)
@@ -152,56 +342,53 @@ class Machine:
                     status=True,
                     speed=highest_speed,
                     temperatures=temperatures,
+                    details=details,
+                    interval=interval,
                 )
                 status.submit()
         else:
             for host in hosts:
                 status = Status(host=self._host)
                 status.submit()
+        return interval
 
 
 class Curve:
     def __init__(self, host: str, sensor: str):
         self._speeds = list(storage.curve_speed(host, sensor).values())
         self._temps = list(storage.curve_temp(host, sensor).values())
+        self._valid = len(self._speeds) > 0 and len(self._speeds) == len(self._temps)
+        self._pwm = self._valid and isinstance(self._speeds[0], int)
+        if self._valid:
+            order = np.argsort(np.asarray(self._temps, dtype=float), kind="stable")
+            self._temp_points = np.asarray(self._temps, dtype=float)[order]
+            if self._pwm:
+                self._speed_points = np.asarray(self._speeds, dtype=float)[order]
+            else:
+                self._speed_points = np.asarray(self._speeds, dtype=object)[order]
 
     def calc(self, temp):
         value = None
-        if isinstance(self._speeds, List) is True and isinstance(self._temps, List) is True and len(self._speeds) == len(self._temps):
-            if isinstance(self._speeds[0], int) is True:
+        if self._valid:
+            if self._pwm:
                 value = self.temp2pwm(temp)
             else:
                 value = self.temp2value(temp)
         return value
 
     def temp2value(self, temp):
-        set_value = None
-        temp_count = len(self._temps)
-        value_count = len(self._speeds)
-        if temp_count < 2 or value_count < 2:
-            set_value = self._speeds[0]
-        if temp <= self._temps[0]:
-            set_value = self._speeds[0]
-        elif temp > self._temps[-1]:
-            set_value = self._speeds[-1]
-        else:
-            for s, t in zip(self._speeds, self._temps):
-                if temp > t:
-                    set_value = s
-                logger.info(f"temp={t} speed={s} set_value={set_value}")
-        return set_value
+        index = np.clip(np.searchsorted(self._temp_points, temp, side="left") - 1, 0, len(self._temp_points) - 1)
+        return self._speed_points[index]
 
     def temp2pwm(self, temp):
-        temps = self._temps
-        temps.insert(0, 1)
-        temps.append(120)
-        pwms = self._speeds
-        pwms.insert(0, self._speeds[0])
-        pwms.append(self._speeds[-1])
-        pwm_interp = interp1d(temps, pwms)
-        temp_range = np.arange(min(temps), max(temps), 1)
-        pwm = math.ceil(pwm_interp(temp_range)[temp - 1])
-        return pwm
+        pwm = np.ceil(np.interp(temp, self._temp_points, self._speed_points))
+        if np.ndim(pwm) == 0:
+            return int(pwm)
+        return pwm.astype(int)
+
+    @property
+    def modal(self) -> bool:
+        return self._valid and self._pwm is False
 
     @property
     def speeds(self):
@@ -212,26 +399,60 @@ class Curve:
         return self._temps
 
 
+class Adaptive:
+    step: float = 1
+    margin: float = 5
+    smoothing: float = 0.5
+    trends: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+
+    @classmethod
+    def interval(cls, key: Tuple[str, str], temp: float, timestamp: float, breakpoints: List[float], minimum: float, maximum: float) -> float:
+        rate = 0.0
+        last = cls.trends.get(key, None)
+        if last is not None:
+            last_temp, last_timestamp, rate = last
+            if timestamp > last_timestamp:
+                rate = cls.smoothing * (temp - last_temp) / (timestamp - last_timestamp) + (1 - cls.smoothing) * rate
+            else:
+                temp, timestamp = last_temp, last_timestamp
+        cls.trends[key] = (temp, timestamp, rate)
+        # Sample often enough that a sensor drifts at most one step between samples.
+        interval = maximum if rate == 0 else min(maximum, cls.step / abs(rate))
+        # Tighten further the closer the sensor is to a breakpoint it is heading toward, one drifting less than a step per maximum interval is heading nowhere.
+        if abs(rate) * maximum >= cls.step:
+            for breakpoint in breakpoints:
+                if breakpoint is None:
+                    continue
+                distance = float(breakpoint) - temp
+                if (rate > 0 and distance < 0) or (rate < 0 and distance > 0):
+                    continue
+                if abs(distance) < cls.margin:
+                    interval = min(interval, minimum + (maximum - minimum) * abs(distance) / cls.margin)
+        return float(np.clip(interval, minimum, maximum))
+
+    @classmethod
+    def clear(cls, host: str) -> None:
+        for key in [key for key in cls.trends if key[0] == host]:
+            del cls.trends[key]
+
+
 class Pid:
     pids: dict = {}
 
     def __init__(self, host: str, sensor: str):
         self.host = host
         self.sensor = sensor
-        self._controller = self.controller
 
     @property
-    def controller(self) -> PID:
+    def controller(self) -> "PID":
+        from simple_pid import PID
+
         if self.host not in self.pids:
             self.pids[self.host] = {}
-        if self.sensor not in self.pids[self.host]:
-            self.pids[self.host][self.sensor] = {}
-        if self.pids[self.host][self.sensor] != storage.pid(self.host, self.sensor):
-            self.pids[self.host][self.sensor] = storage.pid(self.host, self.sensor)
-            self._controller = PID(
-                self.pids[self.host][self.sensor]["Kp"],
-                self.pids[self.host][self.sensor]["Ki"],
-                self.pids[self.host][self.sensor]["Kd"],
-                self.pids[self.host][self.sensor]["Target"],
-            )
-        return self._controller
+        config = dict(storage.pid(self.host, self.sensor))
+        if self.sensor not in self.pids[self.host] or self.pids[self.host][self.sensor]["config"] != config:
+            self.pids[self.host][self.sensor] = {
+                "config": config,
+                "controller": PID(config["Kp"], config["Ki"], config["Kd"], config["Target"]),
+            }
+        return self.pids[self.host][self.sensor]["controller"]
@@ -2,8 +2,10 @@ from typing import Optional
 from nicegui import ui  # type: ignore
 from hush import elements as el
 from hush import storage
+from hush.control import Adaptive
 from hush.hardware import factory
 from hush.interfaces import ssh
+from hush.scheduler import Scheduler
 from hush.tabs import Tab
 
 import logging
@@ -174,6 +176,9 @@ class Drawer(object):
                 ssh.Ssh(f"{name}_oob").remove()
                 if name in storage.hosts:
                     del storage.hosts[name]
+                storage.unindex_shared(name)
+                Scheduler.remove(name)
+                Adaptive.clear(name)
                 for row in self._table.rows:
                     if name == row["name"]:
                         self._table.remove_rows(row)
@@ -196,7 +201,10 @@ class Drawer(object):
                 ssh.Ssh(host, hostname=os_hostname_input.value, username=os_username_input.value)
                 ssh.Ssh(f"{host }_oob", hostname=oob_hostname_input.value, username=oob_username_input.value)
                 self._add_host_to_table(host)
+                storage.touch(host)
                 await factory.Factory.remove_host(name)
+                storage.index_shared(host)
+                Scheduler.reschedule(host)
 
     def _modify_host(self, mode):
         self._hide_content()
@@ -232,6 +240,9 @@ class Drawer(object):
                     ssh.Ssh(f"{row['name']}_oob").remove()
                     if row["name"] in storage.hosts:
                         del storage.hosts[row["name"]]
+                    storage.unindex_shared(row["name"])
+                    Scheduler.remove(row["name"])
+                    Adaptive.clear(row["name"])
                     self._table.remove_rows(row)
         self._modify_host(None)
 
@@ -1,12 +1,17 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Dict, Optional, Union
-from hush.interfaces import http, ssh, ipmitool
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import os
+import time
+from hush.interfaces import http, ssh, ipmitool, rmcp
 from hush import storage
 
 
 class Device:
+    sdr_snapshots: Dict[str, Dict[str, Any]] = {}
+
     def __init__(self, host: str) -> None:
         self.host: str = host
         self.hostname: str = ""
@@ -22,6 +27,13 @@ class Device:
     async def close(self) -> None:
         logger.info(f"The close method is not implemented. {self}")
 
+    async def release(self) -> None:
+        for interface in (self._json_request, self._xml_request):
+            if interface is not None:
+                await interface.close()
+        self._json_request = None
+        self._xml_request = None
+
     async def get_temp(self) -> Optional[int]:
         logger.info(f"The get_temp method is not implemented. {self}")
         return None
@@ -30,10 +42,26 @@ class Device:
         logger.info(f"The set_speed method is not implemented. {self}")
         self._speed = speed
 
+    async def probe(self) -> bool:
+        return True
+
+    def details(self) -> Dict[str, str]:
+        return {}
+
     async def get_fan_speed(self) -> Dict[str, int]:
         logger.info(f"The get_fan_speed method is not implemented. {self}")
         return {}
 
+    async def get_sdr(self, cache_lifetime: float = 3) -> List[Tuple[str, float]]:
+        if self.hostname not in self.sdr_snapshots:
+            self.sdr_snapshots[self.hostname] = {"data": [], "timestamp": 0, "lock": asyncio.Lock()}
+        snapshot = self.sdr_snapshots[self.hostname]
+        async with snapshot["lock"]:
+            if time.monotonic() - snapshot["timestamp"] > cache_lifetime:
+                snapshot["data"] = await self.ipmi.sdr()
+                snapshot["timestamp"] = time.monotonic()
+        return snapshot["data"]
+
     def get_os_credentials(self) -> None:
         self.password = storage.host(self.host)["os"]["password"]
 
@@ -54,7 +82,10 @@ class Device:
     @property
     def ipmi(self) -> ipmitool.IpmiTool:
         if self._ipmitool is None:
-            self._ipmitool = ipmitool.IpmiTool(self.hostname, self.username, "" if self.password is None else self.password)
+            if os.environ.get("IPMI_BACKEND", "ipmitool").lower() == "native":
+                self._ipmitool = rmcp.Lanplus(self.hostname, self.username, "" if self.password is None else self.password)
+            else:
+                self._ipmitool = ipmitool.IpmiTool(self.hostname, self.username, "" if self.password is None else self.password)
         return self._ipmitool
 
     @property
@@ -2,12 +2,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 from typing import Optional, Union
-import numpy as np
 from enum import IntEnum
 from datetime import datetime as dt
 import time
+from hush import lazy
 from . import Device
 
+np = lazy.module("numpy")
+
 
 # https://www.cisco.com/c/en/us/td/docs/unified_computing/ucs/c/sw/api/4_3/b-cisco-imc-xml-api-43.pdf
 
@@ -32,6 +34,9 @@ class M3(Device):
         cookie = await self.cookie()
         await self.xml_request.post(f"<aaaLogout inCookie='{cookie}'></aaaLogout>")
 
+    async def probe(self) -> bool:
+        return await self.xml_request.probe()
+
     async def set_speed(self, speed: Union[str, int, FanPolicy]) -> None:
         self._speed = speed
         if isinstance(speed, str):
@@ -1,9 +1,11 @@
 import time
 import logging
 from typing import Optional, List, Dict
-import numpy as np
+from hush import lazy
 from . import Device
 
+np = lazy.module("numpy")
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +33,9 @@ class Consumer(Device):
     async def close(self):
         return
 
+    async def probe(self) -> bool:
+        return await self.ssh.probe()
+
     async def get_temp(self, temp_names: Optional[List[str]] = None) -> Optional[int]:
         try:
             cache = Consumer._shared_hwmon_cache[self.host]
@@ -217,12 +222,13 @@ class Consumer(Device):
         if not force_refresh and cache["fan"] and (time.time() - cache["fan_time"] < self.CACHE_TTL):
             return list(cache["fan"].keys())
 
-        cache["fan"].clear()
+        fans = {}
         try:
             res_pwm = await self.ssh.shell("'ls -1 /sys/class/hwmon/hwmon*/pwm*[0-9] 2>/dev/null || true'")
             pwm_paths = [line.strip() for line in res_pwm.stdout_lines if line.strip()]
 
             if not pwm_paths:
+                cache["fan"] = fans
                 return []
 
             # Using . instead of ^ to perfectly match text without any regex shell quoting issues
@@ -240,8 +246,9 @@ class Consumer(Device):
 
                 # 100% static string guaranteed to survive reboots (e.g. "nct6775 - PWM 1")
                 human_name = f"{device_name} - PWM {idx}"
-                cache["fan"][human_name] = pwm_path
+                fans[human_name] = pwm_path
 
+            cache["fan"] = fans
             cache["fan_time"] = time.time()
 
         except Exception as e:
@@ -256,7 +263,7 @@ class Consumer(Device):
         if not force_refresh and cache["temp"] and (time.time() - cache["temp_time"] < self.CACHE_TTL):
             return list(cache["temp"].keys())
 
-        cache["temp"].clear()
+        temps = {}
         try:
             res_temps = await self.ssh.shell("'grep -aH . /sys/class/hwmon/hwmon*/temp*_input 2>/dev/null || true'")
             temp_files = []
@@ -267,6 +274,7 @@ class Consumer(Device):
                         temp_files.append(path.strip())
 
             if not temp_files:
+                cache["temp"] = temps
                 return []
 
             res_names = await self.ssh.shell("'grep -aH . /sys/class/hwmon/hwmon*/name 2>/dev/null || true'")
@@ -295,8 +303,9 @@ class Consumer(Device):
                     label = f"Temp {idx_str}"
 
                 human_name = f"{device_name} - {label}"
-                cache["temp"][human_name] = temp_path
+                temps[human_name] = temp_path
 
+            cache["temp"] = temps
             cache["temp_time"] = time.time()
 
         except Exception as e:
@@ -1,23 +1,131 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Literal, Optional
-import numpy as np
+from typing import Any, Callable, Dict, Literal, Optional, Tuple
+from dataclasses import dataclass, field
+from hush import lazy
 from hush import storage
+from hush.breaker import Breaker
 from hush import hardware
-from hush.hardware import cisco
-from hush.hardware import nvidia
-from hush.hardware import idrac
-from hush.hardware import ilo
-from hush.hardware import smart
-from hush.hardware import supermicro
-from hush.hardware import openjbod
-from hush.hardware import consumer
 from hush.tabs.monitor import Status, FanSpeeds
 
+np = lazy.module("numpy")
+
+
+def _no_kwargs(host: str, group: str) -> Dict[str, Any]:
+    return {}
+
+
+def _ilo4_fans(host: str, group: str) -> Dict[str, Any]:
+    return {"fans": storage.host(host)["ilo4"].get(group, [])}
+
+
+def _ilo4_all_fans(host: str, group: str) -> Dict[str, Any]:
+    return {"fans": []}
+
+
+def _ilo4_temps(host: str, group: str) -> Dict[str, Any]:
+    return {"temps": storage.host(host)["ilo4"].get(group, [])}
+
+
+def _supermicro_zones(host: str, group: str) -> Dict[str, Any]:
+    return {"speed_zones": storage.host(host)["supermicro"].get(group, [])}
+
+
+def _consumer_fans(host: str, group: str) -> Dict[str, Any]:
+    return {"fan_names": storage.host(host)["consumer"].get(group, [])}
+
+
+def _consumer_temps(host: str, group: str) -> Dict[str, Any]:
+    return {"temp_names": storage.host(host)["consumer"].get(group, [])}
+
+
+def _smart_all(host: str, group: str) -> Dict[str, Any]:
+    return {"standby": storage.host(host)["smart"].get("standby", False)}
+
+
+def _smart_drives(host: str, group: str) -> Dict[str, Any]:
+    return {"drives": storage.host(host)["smart"].get(group, []), **_smart_all(host, group)}
+
+
+def _idrac_chassis(host: str, group: str) -> Dict[str, Any]:
+    sensors = {
+        "Inlet": {"names": ["Inlet Temp"], "function": np.max},
+        "Exhaust": {"names": ["Exhaust Temp"], "function": np.max},
+        "Exhaust - Inlet": {"names": ["Exhaust Temp", "Inlet Temp"], "function": np.subtract},
+    }
+    selection = storage.host(host)["idrac"].get(group, "Inlet")
+    return {"sensor_names": sensors[selection]["names"], "sensor_function": sensors[selection]["function"]}
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+@dataclass(frozen=True)
+class DriverSpec:
+    module: str
+    cls: str
+    kwargs: Callable[[str, str], Dict[str, Any]] = field(default=_no_kwargs)
+    setup: Optional[str] = None
+
+    def key(self, host: str, kwargs: Dict[str, Any]) -> Tuple:
+        return (self.module, self.cls, host, self.setup, _freeze(kwargs))
+
+    async def build(self, host: str, kwargs: Dict[str, Any]) -> hardware.Device:
+        instance = getattr(lazy.module(f"hush.hardware.{self.module}"), self.cls)(host, **kwargs)
+        if self.setup is not None:
+            await getattr(instance, self.setup)()
+        return instance
+
 
 class Factory:
+    registry: Dict[Tuple[str, str], DriverSpec] = {
+        ("speed", "Dell iDRAC 7"): DriverSpec("idrac", "Ipmi"),
+        ("speed", "Dell iDRAC 8"): DriverSpec("idrac", "Ipmi"),
+        ("speed", "Dell iDRAC 9"): DriverSpec("idrac", "Redfish"),
+        ("speed", "HP iLO 4 All"): DriverSpec("ilo", "iLO4", _ilo4_all_fans),
+        ("speed", "HP iLO 4 Discrete"): DriverSpec("ilo", "iLO4", _ilo4_fans),
+        ("speed", "Supermicro X9"): DriverSpec("supermicro", "X9"),
+        ("speed", "Supermicro X10 All"): DriverSpec("supermicro", "X10"),
+        ("speed", "Supermicro X10 Discrete"): DriverSpec("supermicro", "X10", _supermicro_zones),
+        ("speed", "Supermicro X11 All"): DriverSpec("supermicro", "X11"),
+        ("speed", "Supermicro X11 Discrete"): DriverSpec("supermicro", "X11", _supermicro_zones),
+        ("speed", "Cisco M3"): DriverSpec("cisco", "M3"),
+        ("speed", "Cisco M4"): DriverSpec("cisco", "M4"),
+        ("speed", "Cisco M5"): DriverSpec("cisco", "M5"),
+        ("speed", "OpenJBOD"): DriverSpec("openjbod", "Rp2040"),
+        ("speed", "Nvidia"): DriverSpec("nvidia", "Gpu"),
+        ("speed", "Consumer HWMON Discrete"): DriverSpec("consumer", "Consumer", _consumer_fans),
+        ("cpu", "Dell iDRAC 7"): DriverSpec("idrac", "Ipmi"),
+        ("cpu", "Dell iDRAC 8"): DriverSpec("idrac", "Ipmi"),
+        ("cpu", "Dell iDRAC 9"): DriverSpec("idrac", "Redfish"),
+        ("cpu", "HP iLO 4 All"): DriverSpec("ilo", "iLO4", setup="set_cpu_temp_names"),
+        ("cpu", "HP iLO 4 Discrete"): DriverSpec("ilo", "iLO4", _ilo4_temps),
+        ("cpu", "Supermicro X9"): DriverSpec("supermicro", "X9"),
+        ("cpu", "Supermicro X10"): DriverSpec("supermicro", "X10"),
+        ("cpu", "Supermicro X11"): DriverSpec("supermicro", "X11"),
+        ("cpu", "Cisco M3"): DriverSpec("cisco", "M3"),
+        ("cpu", "Cisco M4"): DriverSpec("cisco", "M4"),
+        ("cpu", "Cisco M5"): DriverSpec("cisco", "M5"),
+        ("cpu", "Consumer HWMON Discrete"): DriverSpec("consumer", "Consumer", _consumer_temps),
+        ("pci", "HP iLO 4 All"): DriverSpec("ilo", "iLO4", setup="set_pci_temp_names"),
+        ("pci", "HP iLO 4 Discrete"): DriverSpec("ilo", "iLO4", _ilo4_temps),
+        ("pci", "Consumer HWMON Discrete"): DriverSpec("consumer", "Consumer", _consumer_temps),
+        ("drive", "SMART All"): DriverSpec("smart", "Smart", _smart_all),
+        ("drive", "SMART Discrete"): DriverSpec("smart", "Smart", _smart_drives),
+        ("gpu", "Nvidia"): DriverSpec("nvidia", "Gpu"),
+        ("gpu", "Supermicro"): DriverSpec("supermicro", "Gpu"),
+        ("chassis", "OpenJBOD"): DriverSpec("openjbod", "Rp2040"),
+        ("chassis", "Dell iDRAC 7"): DriverSpec("idrac", "Ipmi", _idrac_chassis),
+        ("chassis", "Dell iDRAC 8"): DriverSpec("idrac", "Ipmi", _idrac_chassis),
+    }
     drivers: dict = {}
+    instances: dict = {}
 
     @classmethod
     async def remove_host(cls, host: str) -> None:
@@ -26,12 +134,20 @@ class Factory:
             for group in groups:
                 await cls.close(host, group)
             del cls.drivers[host]
+        Breaker.clear(host)
+        storage.touch(host)
 
     @classmethod
     def add_group(cls, host: str, group: str) -> None:
         cls.drivers[host][group] = {}
         cls.drivers[host][group]["name"] = ""
-        cls.drivers[host][group]["instance"] = None
+        cls.drivers[host][group]["key"] = None
+
+    @classmethod
+    def resolve(cls, host: str, group: str) -> Tuple[str, str]:
+        host = storage.shared_controller(host, group)
+        name = storage.host(host).get(group, "None")
+        return host, name
 
     @classmethod
     async def driver(
@@ -39,120 +155,27 @@ class Factory:
         host: str,
         group: str,
     ) -> Optional[hardware.Device]:
-        name = storage.host(host).get(group, "None")
-        if name == "Shared":
-            host = storage.host(host)["shared"][group]
-            name = storage.host(host).get(group, "None")
+        host, name = cls.resolve(host, group)
         if host not in cls.drivers:
             cls.drivers[host] = {}
         if group not in cls.drivers[host]:
             cls.add_group(host, group)
         if cls.drivers[host][group]["name"] != name:
-            if cls.drivers[host][group]["instance"] is not None:
+            if cls.drivers[host][group]["key"] is not None:
                 await cls.close(host, group)
                 cls.add_group(host, group)
+            spec = cls.registry.get((group, name), None)
+            if spec is not None:
+                kwargs = spec.kwargs(host, group)
+                key = spec.key(host, kwargs)
+                if key not in cls.instances:
+                    instance = await spec.build(host, kwargs)
+                    cls.instances[key] = {"instance": instance, "groups": set()}
+                cls.instances[key]["groups"].add((host, group))
+                cls.drivers[host][group]["key"] = key
             cls.drivers[host][group]["name"] = name
-            if group == "speed":
-                if name == "Dell iDRAC 7":
-                    cls.drivers[host][group]["instance"] = idrac.Ipmi(host)
-                elif name == "Dell iDRAC 8":
-                    cls.drivers[host][group]["instance"] = idrac.Ipmi(host)
-                elif name == "Dell iDRAC 9":
-                    cls.drivers[host][group]["instance"] = idrac.Redfish(host)
-                elif name == "HP iLO 4 All":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host, fans=[])
-                elif name == "HP iLO 4 Discrete":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host, fans=storage.host(host)["ilo4"].get(group, []))
-                elif name == "Supermicro X9":
-                    cls.drivers[host][group]["instance"] = supermicro.X9(host)
-                elif name == "Supermicro X10 All":
-                    cls.drivers[host][group]["instance"] = supermicro.X10(host)
-                elif name == "Supermicro X10 Discrete":
-                    cls.drivers[host][group]["instance"] = supermicro.X10(host, speed_zones=storage.host(host)["supermicro"].get(group, []))
-                elif name == "Supermicro X11 All":
-                    cls.drivers[host][group]["instance"] = supermicro.X11(host)
-                elif name == "Supermicro X11 Discrete":
-                    cls.drivers[host][group]["instance"] = supermicro.X11(host, speed_zones=storage.host(host)["supermicro"].get(group, []))
-                elif name == "Cisco M3":
-                    cls.drivers[host][group]["instance"] = cisco.M3(host)
-                elif name == "Cisco M4":
-                    cls.drivers[host][group]["instance"] = cisco.M4(host)
-                elif name == "Cisco M5":
-                    cls.drivers[host][group]["instance"] = cisco.M5(host)
-                elif name == "OpenJBOD":
-                    cls.drivers[host][group]["instance"] = openjbod.Rp2040(host)
-                elif name == "Nvidia":
-                    cls.drivers[host][group]["instance"] = nvidia.Gpu(host)
-                elif name == "Consumer HWMON Discrete":
-                    cls.drivers[host][group]["instance"] = consumer.Consumer(host, fan_names=storage.host(host)["consumer"].get(group, []))
-                else:
-                    cls.drivers[host][group]["instance"] = None
-            if group == "cpu":
-                if name == "Dell iDRAC 7":
-                    cls.drivers[host][group]["instance"] = idrac.Ipmi(host)
-                elif name == "Dell iDRAC 8":
-                    cls.drivers[host][group]["instance"] = idrac.Ipmi(host)
-                elif name == "Dell iDRAC 9":
-                    cls.drivers[host][group]["instance"] = idrac.Redfish(host)
-                elif name == "HP iLO 4 All":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host)
-                    await cls.drivers[host][group]["instance"].set_cpu_temp_names()
-                elif name == "HP iLO 4 Discrete":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host, temps=storage.host(host)["ilo4"].get(group, []))
-                elif name == "Supermicro X9":
-                    cls.drivers[host][group]["instance"] = supermicro.X9(host)
-                elif name == "Supermicro X10":
-                    cls.drivers[host][group]["instance"] = supermicro.X10(host)
-                elif name == "Supermicro X11":
-                    cls.drivers[host][group]["instance"] = supermicro.X11(host)
-                elif name == "Cisco M3":
-                    cls.drivers[host][group]["instance"] = cisco.M3(host)
-                elif name == "Cisco M4":
-                    cls.drivers[host][group]["instance"] = cisco.M4(host)
-                elif name == "Cisco M5":
-                    cls.drivers[host][group]["instance"] = cisco.M5(host)
-                elif name == "Consumer HWMON Discrete":
-                    cls.drivers[host][group]["instance"] = consumer.Consumer(host, temp_names=storage.host(host)["consumer"].get(group, []))
-                else:
-                    cls.drivers[host][group]["instance"] = None
-            if group == "pci":
-                if name == "HP iLO 4 All":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host)
-                    await cls.drivers[host][group]["instance"].set_pci_temp_names()
-                elif name == "HP iLO 4 Discrete":
-                    cls.drivers[host][group]["instance"] = ilo.iLO4(host, temps=storage.host(host)["ilo4"].get(group, []))
-                elif name == "Consumer HWMON Discrete":
-                    cls.drivers[host][group]["instance"] = consumer.Consumer(host, temp_names=storage.host(host)["consumer"].get(group, []))
-                else:
-                    cls.drivers[host][group]["instance"] = None
-            elif group == "drive":
-                if name == "SMART All":
-                    cls.drivers[host][group]["instance"] = smart.Smart(host)
-                elif name == "SMART Discrete":
-                    cls.drivers[host][group]["instance"] = smart.Smart(host, drives=storage.host(host)["smart"].get(group, []))
-                else:
-                    cls.drivers[host][group]["instance"] = None
-            if group == "gpu":
-                if name == "Nvidia":
-                    cls.drivers[host][group]["instance"] = nvidia.Gpu(host)
-                elif name == "Supermicro":
-                    cls.drivers[host][group]["instance"] = supermicro.Gpu(host)
-                else:
-                    cls.drivers[host][group]["instance"] = None
-            if group == "chassis":
-                if name == "OpenJBOD":
-                    cls.drivers[host][group]["instance"] = openjbod.Rp2040(host)
-                elif name == "Dell iDRAC 7" or name == "Dell iDRAC 8":
-                    sensors = {
-                        "Inlet": {"names": ["Inlet Temp"], "function": np.max},
-                        "Exhaust": {"names": ["Exhaust Temp"], "function": np.max},
-                        "Exhaust - Inlet": {"names": ["Exhaust Temp", "Inlet Temp"], "function": np.subtract},
-                    }
-                    selection = storage.host(host)["idrac"].get(group, "Inlet")
-                    cls.drivers[host][group]["instance"] = idrac.Ipmi(host, sensor_names=sensors[selection]["names"], sensor_function=sensors[selection]["function"])
-                else:
-                    cls.drivers[host][group]["instance"] = None
-        return cls.drivers[host][group]["instance"]
+        key = cls.drivers[host][group]["key"]
+        return None if key is None else cls.instances[key]["instance"]
 
     @classmethod
     async def close(
@@ -162,17 +185,30 @@ class Factory:
     ):
         if host in cls.drivers:
             if group in cls.drivers[host]:
-                if "instance" in cls.drivers[host][group]:
-                    if cls.drivers[host][group]["instance"] is not None:
-                        instance = cls.drivers[host][group]["instance"]
+                key = cls.drivers[host][group]["key"]
+                if key is not None and key in cls.instances:
+                    shared = cls.instances[key]
+                    shared["groups"].discard((host, group))
+                    if group == "speed":
+                        # close() hands the fans back to the BMC and may end its session, groups still sharing the instance rebuild their own on the next read.
+                        for other_host, other_group in shared["groups"]:
+                            cls.add_group(other_host, other_group)
+                            storage.touch(other_host)
+                        shared["groups"].clear()
+                    if len(shared["groups"]) == 0:
+                        del cls.instances[key]
+                        instance = shared["instance"]
                         logger.info(f"Closing hardware driver for {host}: {instance}")
                         try:
                             await instance.close()
                         except Exception as e:
                             logger.info(f"Failed to close hardware driver for {host}: {instance}")
-        if host in cls.drivers:
-            if group in cls.drivers[host]:
+                        try:
+                            await instance.release()
+                        except Exception as e:
+                            logger.info(f"Failed to release hardware driver for {host}: {instance}")
                 del cls.drivers[host][group]
+        storage.touch(host)
         Status.clear(host=host)
         FanSpeeds.clear(host=host)
 
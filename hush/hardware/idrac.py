@@ -2,11 +2,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 from typing import Any, List, Optional
+import asyncio
 from enum import IntEnum
 import json
 import re
-import numpy as np
+from hush import lazy
 from . import Device
+from hush.interfaces import http
+
+np = lazy.module("numpy")
 
 # https://www.dell.com/support/manuals/en-us/idrac9-lifecycle-controller-v6.x-series/idrac9_6.xx_racadm_pub/introduction
 # https://dl.dell.com/content/manual35024470-integrated-dell-remote-access-controller-9-racadm-cli-guide.pdf?language=en-us
@@ -24,30 +28,70 @@ class Redfish(Device):
         HIGH = 3
         MAX = 4
 
+    cpu_sensor = re.compile(r"CPU\d ?Temp")
+
     def __init__(self, host: str) -> None:
         super().__init__(host)
         self.get_oob_credentials()
-        self.json_request.base_path = f"https://{self.hostname}/redfish/v1/"
+        self._temp_source: Optional[str] = None
+        self._sensor_paths: Optional[List[str]] = None
+
+    async def probe(self) -> bool:
+        return await self.json_request.probe()
+
+    @property
+    def json_request(self) -> http.Redfish:
+        if self._json_request is None:
+            self._json_request = http.Redfish(self.hostname, self.username, self.password)
+        return self._json_request
 
     async def get_temp(self, core=None):
         cpu_temps = list()
-        response = None
-        try:
-            response = await self.json_request.get(path="Chassis/System.Embedded.1/Sensors")
-            sensor_paths = re.findall(r"Chassis\/System.Embedded.1\/Sensors\/CPU\dTemp", str(response))
-            for sensor_path in sensor_paths:
-                response = await self.json_request.get(path=f"{sensor_path}")
-                cpu_temps.append(float(response["Reading"]))
-        except Exception as e:
-            if response is not None:
-                logger.error(f"{self.hostname} failed to get cpu temperature from: {response}")
-            raise e
+        sources = [self._temp_source] if self._temp_source is not None else ["thermal", "expand", "index"]
+        for source in sources:
+            try:
+                if source == "thermal":
+                    cpu_temps = await self._thermal_temps()
+                elif source == "expand":
+                    cpu_temps = await self._expanded_temps()
+                else:
+                    cpu_temps = await self._indexed_temps()
+            except Exception as e:
+                self._temp_source = None
+                if source == "index":
+                    self._sensor_paths = None
+                if source == sources[-1]:
+                    logger.error(f"{self.hostname} failed to get cpu temperature from {source} sensors.")
+                    raise e
+                continue
+            if len(cpu_temps) > 0:
+                self._temp_source = source
+                break
+            self._temp_source = None
         if core is None:
             self._temp = int(np.max(cpu_temps))
         else:
             self._temp = cpu_temps[core]
         return self._temp
 
+    async def _thermal_temps(self) -> List[float]:
+        response = await self.json_request.get(path="Chassis/System.Embedded.1/Thermal")
+        temperatures = sorted(response.get("Temperatures", []), key=lambda t: t.get("Name", ""))
+        return [float(t["ReadingCelsius"]) for t in temperatures if self.cpu_sensor.fullmatch(t.get("Name", "")) and t.get("ReadingCelsius") is not None]
+
+    async def _expanded_temps(self) -> List[float]:
+        response = await self.json_request.get(path="Chassis/System.Embedded.1/Sensors?$expand=*($levels=1)")
+        members = sorted(response.get("Members", []), key=lambda m: m.get("Id", ""))
+        return [float(m["Reading"]) for m in members if self.cpu_sensor.fullmatch(m.get("Id", "")) and m.get("Reading") is not None]
+
+    async def _indexed_temps(self) -> List[float]:
+        if self._sensor_paths is None:
+            response = await self.json_request.get(path="Chassis/System.Embedded.1/Sensors")
+            paths = [m.get("@odata.id", "") for m in response.get("Members", [])]
+            self._sensor_paths = sorted(p.split("/redfish/v1/", 1)[-1] for p in paths if self.cpu_sensor.fullmatch(p.rsplit("/", 1)[-1]))
+        responses = await asyncio.gather(*[self.json_request.get(path=path) for path in self._sensor_paths])
+        return [float(response["Reading"]) for response in responses]
+
     async def set_speed(self, speed):
         response = None
         if isinstance(speed, str) is True:
@@ -100,16 +144,19 @@ class Ipmi(Device):
         MANUAL = 0
         IDRAC = 1
 
-    def __init__(self, host: str, sensor_names: List[str] = ["Temp"], sensor_function: Any = np.max) -> None:
+    def __init__(self, host: str, sensor_names: List[str] = ["Temp"], sensor_function: Any = None) -> None:
         super().__init__(host)
         self.get_oob_credentials()
         self.sensor_names = sensor_names
-        self.sensor_function = sensor_function
+        self.sensor_function = np.max if sensor_function is None else sensor_function
         self._fan_mode = self.FanMode.IDRAC
 
     async def close(self) -> None:
         await self.set_fan_mode(self.FanMode.IDRAC)
 
+    async def probe(self) -> bool:
+        return await self.ipmi.probe()
+
     async def set_fan_mode(self, mode: FanMode) -> None:
         result = await self.ipmi.execute(f"raw 0x30 0x30 0x01 0x0{int(mode)}")
         if result.stdout != "\n":
@@ -121,13 +168,10 @@ class Ipmi(Device):
         sensor_temps = []
         response = None
         try:
-            response = await self.ipmi.execute("-c sdr")
-            data_lines = response.stdout_lines
-            for data in data_lines:
-                data = data.split(",")
-                for name in self.sensor_names:
-                    if data[0] == name and data[1] != "":
-                        sensor_temps.append(float(data[1]))
+            response = await self.get_sdr()
+            for name, value in response:
+                if name in self.sensor_names:
+                    sensor_temps.append(value)
             if isinstance(self.sensor_function, int):
                 self._temp = sensor_temps[self.sensor_function]
             else:
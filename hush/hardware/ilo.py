@@ -4,9 +4,11 @@ logger = logging.getLogger(__name__)
 from typing import Any, Dict, List, Optional
 import time
 import re
-import numpy as np
+from hush import lazy
 from . import Device
-from hush.interfaces import ssh
+from hush.interfaces import http, ssh
+
+np = lazy.module("numpy")
 
 
 class iLO4(Device):
@@ -17,7 +19,6 @@ class iLO4(Device):
         self._fans = fans
         self._temps = temps
         self.get_oob_credentials()
-        self.json_request.base_path = f"https://{self.hostname}/redfish/v1/"
 
     async def close(self):
         if self._fans is not None and len(self._fans) > 0:
@@ -25,6 +26,15 @@ class iLO4(Device):
                 f = int(fan[4:]) - 1
                 await self.ssh.shell(f"fan p {f} unlock")
 
+    async def probe(self) -> bool:
+        return await self.json_request.probe()
+
+    @property
+    def json_request(self) -> http.Redfish:
+        if self._json_request is None:
+            self._json_request = http.Redfish(self.hostname, self.username, self.password)
+        return self._json_request
+
     async def get_thermal_info(self, cache_lifetime=60):
         if self.hostname not in self.thermal_info:
             self.thermal_info[self.hostname] = {"data": {}, "timestamp": 0}
@@ -94,5 +104,6 @@ class iLO4(Device):
                     "HostKeyAlgorithms": "+ssh-rsa",
                     "KexAlgorithms": "+diffie-hellman-group14-sha1",
                 },
+                multiplex=False,
             )
         return self._ssh
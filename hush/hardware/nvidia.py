@@ -1,15 +1,20 @@
 import logging
 
 logger = logging.getLogger(__name__)
-import numpy as np
+from hush import lazy
 from . import Device
 
+np = lazy.module("numpy")
+
 
 class Gpu(Device):
     def __init__(self, host: str) -> None:
         super().__init__(host)
         self.get_os_credentials()
 
+    async def probe(self) -> bool:
+        return await self.ssh.probe()
+
     async def get_temp(self):
         try:
             result = await self.ssh.shell(f"nvidia-smi --query-gpu=temperature.gpu --format=csv,noheader")
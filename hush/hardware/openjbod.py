@@ -3,10 +3,12 @@ import logging
 logger = logging.getLogger(__name__)
 from typing import Optional
 from enum import IntEnum
-import numpy as np
+from hush import lazy
 from . import Device
 from hush.interfaces import http
 
+np = lazy.module("numpy")
+
 
 class Rp2040(Device):
     def __init__(self, host: str) -> None:
@@ -16,6 +18,9 @@ class Rp2040(Device):
     async def close(self):
         await self.json_request.post(path="api/fanmode", payload={"use_ext_fan_ctrl": False})
 
+    async def probe(self) -> bool:
+        return await self.json_request.probe()
+
     async def get_temp(self):
         response = await self.json_request.get(path="api/temperatures")
         self._temp = max(response.values())
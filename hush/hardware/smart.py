@@ -1,58 +1,150 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import re
-import numpy as np
+import shlex
+import time
+from hush import lazy
 from . import Device
+from hush.interfaces import cli
+
+np = lazy.module("numpy")
+
+
+class DriveTemps(cli.Parser):
+    # ATA attribute table row: ID# ATTRIBUTE_NAME FLAG VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
+    attribute = re.compile(r"^(194|190)\s+\S+\s+\S+\s+\d+\s+\d+\s+\S+\s+\S+\s+\S+\s+\S+\s+(-?\d+)")
+    standby = re.compile(r"Device is in (?:STANDBY|SLEEP)")
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.data = {}
+        self._airflow: Dict[str, float] = {}
+
+    def feed(self, line: str) -> None:
+        drive, _, line = line.strip().partition(" ")
+        line = line.strip()
+        if self.standby.match(line) is not None:
+            self.data[drive] = None
+            return
+        match = self.attribute.search(line)
+        if match is not None:
+            if match.group(1) == "194":
+                self.data[drive] = float(match.group(2))
+            else:
+                self._airflow[drive] = float(match.group(2))
+            return
+        for pattern in self.patterns:
+            match = pattern.search(line)
+            if match is not None and match.lastindex == 1:
+                self.data.setdefault(drive, float(match.group(1)))
+                return
+
+    def finish(self) -> None:
+        for drive, temp in self._airflow.items():
+            self.data.setdefault(drive, temp)
 
 
 class Smart(Device):
-    def __init__(self, host: str, drives: Optional[List[str]] = None) -> None:
+    drive_list_lifetime: float = 600
+    standby_temp: float = 25
+    drive_pattern = r"Disk (\/dev\/sd[a-z]+|\/dev\/nvme[0-9]+n[0-9]+)"
+    temp_patterns = [r"^(?:Current(?:\sDrive)?\s)?Temperature:\s*(-?\d+)", r"(-?\d+)\s+---\s+(?:Current\s+)?Temperature\Z"]
+
+    def __init__(self, host: str, drives: Optional[List[str]] = None, standby: bool = False) -> None:
         super().__init__(host)
         self._drives = drives
+        self.standby = standby
+        self._drive_list: List[str] = []
+        self._drive_list_timestamp: float = 0
+        self._readings: Dict[str, Tuple[float, float]] = {}
+        self._sleeping: List[str] = []
+        self._skipped_wakeups: int = 0
         self.get_os_credentials()
 
+    async def probe(self) -> bool:
+        return await self.ssh.probe()
+
     async def get_drive_list(self):
         drive_paths = []
+        result = None
         try:
-            result = await self.ssh.shell("fdisk -l")
-            drive_paths = re.findall(r"Disk (\/dev\/sd[a-z]+|\/dev\/nvme[0-9]+n[0-9]+)", result.stdout)
+            result = await self.ssh.shell("fdisk -l", parser=cli.FindAll(self.drive_pattern))
+            drive_paths = result.data
         except Exception as e:
             logger.info(f"{self} failed to get drive list:")
             logger.info(f"result = {result}")
             raise e
         return drive_paths
 
-    async def get_drive_temp(self, drive_path):
+    async def drive_paths(self) -> List[str]:
+        if self._drives is not None and self._drives != []:
+            return self._drives
+        if len(self._drive_list) == 0 or time.monotonic() - self._drive_list_timestamp > self.drive_list_lifetime:
+            self._drive_list = await self.get_drive_list()
+            self._drive_list_timestamp = time.monotonic()
+        return self._drive_list
+
+    async def get_drive_temps(self, drive_paths: List[str]) -> Dict[str, Optional[float]]:
+        result = None
         try:
-            result = await self.ssh.shell(f'smartctl -x {drive_path} | grep -E "Temperature|temperature"')
-            regular_expressions = [r"^(?:Current(?:\sDrive)?\s)?Temperature:\s*(-?\d+)", r"(-?\d+)\s+---\s+(?:Current\s+)?Temperature\Z"]
-            for line in result.stdout_lines:
-                for regular_expression in regular_expressions:
-                    temp = re.search(regular_expression, line.strip())
-                    if temp is not None and temp.lastindex == 1:
-                        return float(temp.group(1))
-            logger.info(f"{self.hostname} failed to get drive temperature {drive_path}:")
-            logger.info(f"result = {result}")
-            return None
+            # One ssh round trip per cycle, every drive is queried concurrently on the remote side and each line is tagged with its drive.
+            drives = " ".join(shlex.quote(drive_path) for drive_path in drive_paths)
+            # With standby enabled smartctl -n standby bails out on spun-down drives instead of waking them, those come back as None.
+            smartctl = "smartctl -n standby -A" if self.standby is True else "smartctl -A"
+            command = f'for d in {drives}; do ({smartctl} "$d" 2>&1 | sed "s|^|$d |") & done; wait'
+            result = await self.ssh.shell(shlex.quote(command), parser=DriveTemps(self.temp_patterns))
+            return result.data
         except Exception as e:
-            logger.info(f"{self.hostname} failed to get drive temperature {drive_path}:")
+            logger.info(f"{self.hostname} failed to get drive temperatures {drive_paths}:")
             logger.info(f"result = {result}")
             raise e
 
     async def get_temp(self):
+        drive_paths = []
+        drive_temps = {}
         try:
-            drive_temps = list()
-            if self._drives is None or self._drives == []:
-                self._drives = await self.get_drive_list()
-            for drive_path in self._drives:
-                temp = await self.get_drive_temp(drive_path=drive_path)
-                if temp is not None:
-                    drive_temps.append(float(temp))
-            self._temp = int(np.max(drive_temps))
+            drive_paths = await self.drive_paths()
+            drive_temps = await self.get_drive_temps(drive_paths)
+            missing = [drive_path for drive_path in drive_paths if drive_path not in drive_temps]
+            if len(missing) > 0:
+                logger.info(f"{self.hostname} no temperature for {missing}, refreshing drive list.")
+                self._drive_list_timestamp = 0
+            now = time.monotonic()
+            awake = []
+            self._sleeping = []
+            for drive_path, temp in drive_temps.items():
+                if temp is None:
+                    self._sleeping.append(drive_path)
+                else:
+                    self._readings[drive_path] = (temp, now)
+                    awake.append(temp)
+            self._skipped_wakeups += len(self._sleeping)
+            if len(awake) > 0:
+                self._temp = int(np.max(awake))
+            elif len(self._sleeping) > 0:
+                # Every drive is spun down, sleeping drives are cool so fall back to their coolest last reading.
+                last = [self._readings[drive_path][0] for drive_path in self._sleeping if drive_path in self._readings]
+                self._temp = int(np.min(last)) if len(last) > 0 else int(self.standby_temp)
+            else:
+                raise ValueError(f"{self.hostname} returned no drive temperatures.")
             return self._temp
         except Exception as e:
-            logger.info(f"drive_paths = {self._drives}")
+            logger.info(f"drive_paths = {drive_paths}")
             logger.info(f"drive_temps = {drive_temps}")
             raise e
+
+    def details(self) -> Dict[str, str]:
+        if self.standby is False:
+            return {}
+        now = time.monotonic()
+        ages = [now - self._readings[drive_path][1] for drive_path in self._sleeping if drive_path in self._readings]
+        detail = f"{len(self._sleeping)} asleep, {self._skipped_wakeups} wake-ups skipped"
+        if len(ages) > 0:
+            detail += f", oldest reading {int(np.max(ages))}s ago"
+        return {"Drive Standby": detail}
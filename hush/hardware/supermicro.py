@@ -3,10 +3,12 @@ import logging
 logger = logging.getLogger(__name__)
 from typing import Optional
 from enum import IntEnum
-import numpy as np
+from hush import lazy
 from . import Device
 from hush.interfaces import ipmitool
 
+np = lazy.module("numpy")
+
 
 class X9(Device):
     class FanMode(IntEnum):
@@ -25,17 +27,19 @@ class X9(Device):
     async def close(self):
         await self.set_fan_mode(self.FanMode.STANDARD)
 
+    async def probe(self) -> bool:
+        return await self.ipmi.probe()
+
     async def get_temp(self, core=None):
         cpu_temps = list()
+        result = None
         try:
-            result = await self.ipmi.execute("-c sdr")
+            result = await self.get_sdr()
             sensors = ["CPU Temp", "CPU1 Temp", "CPU2 Temp"]
             for sensor in sensors:
-                for line in result.stdout_lines:
-                    if sensor in line:
-                        data = line.split(",")
-                        if data[0] == sensor and data[1] != "":
-                            cpu_temps.append(float(data[1]))
+                for name, value in result:
+                    if name == sensor:
+                        cpu_temps.append(value)
             if core is None:
                 self._temp = int(np.max(cpu_temps))
             else:
@@ -110,15 +114,14 @@ class X11(X10):
 class Gpu(X9):
     async def get_temp(self):
         gpu_temps = list()
+        result = None
         try:
-            result = await self.ipmi.execute("-c sdr")
+            result = await self.get_sdr()
             sensors = ["GPU Temp", "GPU1 Temp", "GPU2 Temp", "GPU3 Temp", "GPU4 Temp", "GPU5 Temp", "GPU6 Temp"]
             for sensor in sensors:
-                for line in result.stdout_lines:
-                    if sensor in line:
-                        data = line.split(",")
-                        if data[0] == sensor and data[1] != "":
-                            gpu_temps.append(float(data[1]))
+                for name, value in result:
+                    if name == sensor:
+                        gpu_temps.append(value)
             self._temp = int(np.max(gpu_temps))
             return self._temp
         except Exception as e:
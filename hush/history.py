@@ -0,0 +1,69 @@
+import logging
+
+logger = logging.getLogger(__name__)
+from typing import Dict, List, Mapping, Optional, Tuple
+from hush import lazy
+
+np = lazy.module("numpy")
+
+
+class History:
+    # Every row is written twice, at head and head + capacity, so the newest rows are always one contiguous slice and reads never copy.
+    capacity: int = 2880
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        if capacity is not None:
+            self.capacity = capacity
+        self.timestamps = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.values = np.full((2 * self.capacity, 0), np.nan, dtype=np.float32)
+        self.columns: Dict[str, int] = {}
+        self._head: int = 0
+        self._size: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def column(self, name: str) -> int:
+        if name not in self.columns:
+            self.columns[name] = self.values.shape[1]
+            self.values = np.concatenate((self.values, np.full((2 * self.capacity, 1), np.nan, dtype=np.float32)), axis=1)
+        return self.columns[name]
+
+    def append(self, timestamp: float, values: Mapping[str, Optional[float]]) -> None:
+        indices = [self.column(name) for name in values.keys()]
+        row = np.full(self.values.shape[1], np.nan, dtype=np.float32)
+        for index, value in zip(indices, values.values()):
+            if value is not None:
+                row[index] = value
+        for position in (self._head, self._head + self.capacity):
+            self.timestamps[position] = timestamp
+            self.values[position] = row
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _bounds(self, seconds: Optional[float]) -> Tuple[int, int]:
+        end = self._head + self.capacity
+        start = end - self._size
+        if seconds is not None and self._size > 0:
+            start += int(np.searchsorted(self.timestamps[start:end], self.timestamps[end - 1] - seconds, side="left"))
+        return start, end
+
+    def window(self, seconds: Optional[float] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        start, end = self._bounds(seconds)
+        return self.timestamps[start:end], self.values[start:end]
+
+    def series(self, name: str, seconds: Optional[float] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        start, end = self._bounds(seconds)
+        if name not in self.columns:
+            return self.timestamps[start:end], np.full(end - start, np.nan, dtype=np.float32)
+        return self.timestamps[start:end], self.values[start:end, self.columns[name]]
+
+    def chart(self, name: str, seconds: Optional[float] = None) -> List[List[Optional[float]]]:
+        timestamps, values = self.series(name, seconds)
+        points = np.column_stack((timestamps * 1000, values)).astype(object)
+        points[np.isnan(values), 1] = None
+        return points.tolist()
@@ -1,11 +1,15 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Pattern, Union
 import asyncio
 from asyncio.subprocess import Process, PIPE
+import codecs
 import contextlib
+import os
+import re
 import shlex
+import signal
 from datetime import datetime
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -94,134 +98,172 @@ class Terminal(ui.element, component="../../static/terminal.js", dependencies=["
         self.run_method("call_api_method", name, *args)
 
 
+class Parser:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.done: bool = False
+        self.data: Any = None
+
+    def feed(self, line: str) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+class FindAll(Parser):
+    def __init__(self, pattern: Union[str, Pattern]) -> None:
+        self.pattern = re.compile(pattern)
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.data = []
+
+    def feed(self, line: str) -> None:
+        self.data.extend(self.pattern.findall(line))
+
+
 class Cli:
+    chunk_size: int = 65536
+    kill_timeout: float = 5
+
     def __init__(self, seperator: Union[bytes, None] = b"\n") -> None:
         self.seperator: Union[bytes, None] = seperator
         self.stdout: List[str] = []
         self.stderr: List[str] = []
+        self._stdout_chunks: List[str] = []
+        self._stderr_chunks: List[str] = []
         self._terminate: asyncio.Event = asyncio.Event()
+        self._stop: asyncio.Event = asyncio.Event()
         self._busy: bool = False
+        self._lock: asyncio.Lock = asyncio.Lock()
         self._truncated: bool = False
+        self._line_count: int = 0
         self.prefix_line: str = ""
         self._stdout_terminals: List[Terminal] = []
         self._stderr_terminals: List[Terminal] = []
 
-    async def _wait_on_stream(self, stream: asyncio.streams.StreamReader) -> Union[str, None]:
+    def _split(self, text: str) -> List[str]:
         if self.seperator is None:
-            buf = await stream.read(140)
-        else:
-            try:
-                buf = await stream.readuntil(self.seperator)
-            except asyncio.exceptions.IncompleteReadError as e:
-                buf = e.partial
-            except Exception as e:
-                raise e
-        return buf.decode("utf-8")
-
-    async def _read_stdout(self, stream: asyncio.streams.StreamReader) -> None:
-        while True:
-            buf = await self._wait_on_stream(stream=stream)
-            if buf:
-                self.stdout.append(buf)
-                for terminal in self._stdout_terminals:
-                    terminal.call_terminal_method("write", buf)
-            else:
-                break
-
-    async def _read_stderr(self, stream: asyncio.streams.StreamReader) -> None:
+            return [text] if text else []
+        seperator = self.seperator.decode("utf-8")
+        parts = text.split(seperator)
+        lines = [part + seperator for part in parts[:-1]]
+        if parts[-1]:
+            lines.append(parts[-1])
+        return lines
+
+    async def _read(self, stream: asyncio.streams.StreamReader, chunks: List[str], terminals: List[Terminal], max_output_lines: int, parser: Optional[Parser] = None) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        seperator = self.seperator.decode("utf-8") if self.seperator is not None else None
+        pending = ""
         while True:
-            buf = await self._wait_on_stream(stream=stream)
-            if buf:
-                self.stderr.append(buf)
-                for terminal in self._stderr_terminals:
-                    terminal.call_terminal_method("write", buf)
-            else:
+            data = await stream.read(self.chunk_size)
+            text = decoder.decode(data, final=not data)
+            if text:
+                for terminal in terminals:
+                    terminal.call_terminal_method("write", text)
+                if parser is None:
+                    chunks.append(text)
+                elif parser.done is False:
+                    pending += text
+                    if seperator is not None:
+                        lines = pending.split(seperator)
+                        pending = lines.pop()
+                        for line in lines:
+                            parser.feed(line + seperator)
+                            if parser.done is True:
+                                self._stop.set()
+                                break
+                if max_output_lines > 0:
+                    self._line_count += text.count(seperator) if seperator is not None else 1
+                    if self._line_count > max_output_lines:
+                        self._truncated = True
+                        self._stop.set()
+            if not data:
                 break
+        if parser is not None and parser.done is False:
+            if pending:
+                parser.feed(pending)
+            parser.finish()
 
-    async def _controller(self, process: Process, max_output_lines) -> None:
-        while process.returncode is None:
-            if max_output_lines > 0 and len(self.stderr) + len(self.stdout) > max_output_lines:
-                self._truncated = True
-                process.terminate()
-            if self._terminate.is_set():
-                process.terminate()
+    async def _controller(self, process: Process, timeout: Optional[float]) -> bool:
+        waiters = [asyncio.ensure_future(process.wait()), asyncio.ensure_future(self._terminate.wait()), asyncio.ensure_future(self._stop.wait())]
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if waiters[0] in done:
+                return False
+            if len(done) == 0:
+                logger.warning(f"Command exceeded its {timeout}s deadline, terminating.")
+            self._signal(process, signal.SIGTERM)
             try:
-                with contextlib.suppress(asyncio.TimeoutError):
-                    await asyncio.wait_for(process.wait(), 0.1)
-            except Exception as e:
-                logger.exception(e)
+                await asyncio.wait_for(process.wait(), self.kill_timeout)
+            except asyncio.TimeoutError:
+                self._signal(process, signal.SIGKILL)
+                await process.wait()
+            return len(done) == 0 or self._terminate.is_set()
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def _signal(self, process: Process, sig: int) -> None:
+        # Commands run in their own session so wrappers like sshpass or sh take their children with them.
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(process.pid, sig)
 
     def terminate(self) -> None:
         self._terminate.set()
 
-    async def execute(self, command: str, max_output_lines: int = 0) -> Result:
-        self._busy = True
-        c = shlex.split(command, posix=False)
-        try:
-            logger.debug("command: " + command)
-            process = await asyncio.create_subprocess_exec(*c, stdout=PIPE, stderr=PIPE)
-            if process is not None and process.stdout is not None and process.stderr is not None:
-                self.stdout.clear()
-                self.stderr.clear()
-                self._terminate.clear()
-                self._truncated = False
-                terminated = False
-                now = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
-                self.prefix_line = f"<{now}> {command}\n"
-                for terminal in self._stdout_terminals:
-                    terminal.call_terminal_method("write", "\n" + self.prefix_line)
-                await asyncio.gather(
-                    self._controller(process=process, max_output_lines=max_output_lines),
-                    self._read_stdout(stream=process.stdout),
-                    self._read_stderr(stream=process.stderr),
-                )
-                if self._terminate.is_set():
-                    terminated = True
-                await process.wait()
-        except Exception as e:
-            raise e
-        finally:
-            self._terminate.clear()
-            self._busy = False
-        logger.debug("stdout: " + "".join(self.stdout).strip())
-        logger.debug("stderr: " + "".join(self.stderr).strip())
-        return Result(
-            command=command,
-            return_code=process.returncode,
-            stdout_lines=self.stdout.copy(),
-            stderr_lines=self.stderr.copy(),
-            terminated=terminated,
-            truncated=self._truncated,
-        )
+    async def execute(self, command: str, max_output_lines: int = 0, timeout: Optional[float] = None, parser: Optional[Parser] = None) -> Result:
+        async with self._lock:
+            return await self._run(command=command, max_output_lines=max_output_lines, timeout=timeout, parser=parser, shell=False)
 
-    async def shell(self, command: str, max_output_lines: int = 0) -> Result:
+    async def shell(self, command: str, max_output_lines: int = 0, timeout: Optional[float] = None, parser: Optional[Parser] = None) -> Result:
+        async with self._lock:
+            return await self._run(command=command, max_output_lines=max_output_lines, timeout=timeout, parser=parser, shell=True)
+
+    async def _run(self, command: str, max_output_lines: int = 0, timeout: Optional[float] = None, parser: Optional[Parser] = None, shell: bool = False) -> Result:
         self._busy = True
         try:
             logger.debug("command: " + command)
-            process = await asyncio.create_subprocess_shell(command, stdout=PIPE, stderr=PIPE)
-            if process is not None and process.stdout is not None and process.stderr is not None:
-                self.stdout.clear()
-                self.stderr.clear()
-                self._terminate.clear()
-                self._truncated = False
-                terminated = False
-                now = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
-                self.prefix_line = f"<{now}> {command}\n"
-                for terminal in self._stdout_terminals:
-                    terminal.call_terminal_method("write", "\n" + self.prefix_line)
-                await asyncio.gather(
-                    self._controller(process=process, max_output_lines=max_output_lines),
-                    self._read_stdout(stream=process.stdout),
-                    self._read_stderr(stream=process.stderr),
-                )
-                if self._terminate.is_set():
-                    terminated = True
-                await process.wait()
-        except Exception as e:
-            raise e
+            if shell is True:
+                process = await asyncio.create_subprocess_shell(command, stdout=PIPE, stderr=PIPE, start_new_session=True)
+            else:
+                process = await asyncio.create_subprocess_exec(*shlex.split(command, posix=False), stdout=PIPE, stderr=PIPE, start_new_session=True)
+            self.stdout = []
+            self.stderr = []
+            self._stdout_chunks = []
+            self._stderr_chunks = []
+            self._terminate.clear()
+            self._stop.clear()
+            self._truncated = False
+            self._line_count = 0
+            if parser is not None:
+                parser.reset()
+            now = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
+            self.prefix_line = f"<{now}> {command}\n"
+            for terminal in self._stdout_terminals:
+                terminal.call_terminal_method("write", "\n" + self.prefix_line)
+            readers = [
+                asyncio.ensure_future(self._read(process.stdout, self._stdout_chunks, self._stdout_terminals, max_output_lines, parser)),
+                asyncio.ensure_future(self._read(process.stderr, self._stderr_chunks, self._stderr_terminals, max_output_lines)),
+            ]
+            try:
+                terminated = await self._controller(process=process, timeout=timeout)
+                await asyncio.gather(*readers)
+            finally:
+                if process.returncode is None:
+                    self._signal(process, signal.SIGKILL)
+                for reader in readers:
+                    reader.cancel()
         finally:
             self._terminate.clear()
             self._busy = False
+        self.stdout = self._split("".join(self._stdout_chunks))
+        self.stderr = self._split("".join(self._stderr_chunks))
         logger.debug("stdout: " + "".join(self.stdout).strip())
         logger.debug("stderr: " + "".join(self.stderr).strip())
         return Result(
@@ -231,24 +273,25 @@ class Cli:
             stderr_lines=self.stderr.copy(),
             terminated=terminated,
             truncated=self._truncated,
+            data=None if parser is None else parser.data,
         )
 
     def clear_buffers(self):
         self.prefix_line = ""
-        self.stdout.clear()
-        self.stderr.clear()
+        self.stdout = []
+        self.stderr = []
+        self._stdout_chunks = []
+        self._stderr_chunks = []
 
     def register_stdout_terminal(self, terminal: Terminal) -> None:
         if terminal not in self._stdout_terminals:
             terminal.call_terminal_method("write", self.prefix_line)
-            for line in self.stdout:
-                terminal.call_terminal_method("write", line)
+            terminal.call_terminal_method("write", "".join(self._stdout_chunks))
             self._stdout_terminals.append(terminal)
 
     def register_stderr_terminal(self, terminal: Terminal) -> None:
         if terminal not in self._stderr_terminals:
-            for line in self.stderr:
-                terminal.call_terminal_method("write", line)
+            terminal.call_terminal_method("write", "".join(self._stderr_chunks))
             self._stderr_terminals.append(terminal)
 
     def release_stdout_terminal(self, terminal: Terminal) -> None:
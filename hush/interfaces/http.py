@@ -2,66 +2,205 @@ import logging
 
 logger = logging.getLogger(__name__)
 from typing import Any, Dict, Optional
+import asyncio
+import time
 import httpx
 import json
 import xmltodict
 import urllib3
+from hush.interfaces import net
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 class Http:
-    def __init__(self, hostname: str, username: str, password: Optional[str] = None, secure: bool = True):
+    max_connections: int = 4
+    max_keepalive_connections: int = 2
+    keepalive_expiry: float = 60
+    clients: Dict[str, Dict[str, Any]] = {}
+
+    def __init__(self, hostname: str, username: str, password: Optional[str] = None, secure: bool = True, limits: Optional[httpx.Limits] = None):
         self.hostname: str = hostname
         self.username: str = username
         self.password: str = "" if password is None else password
         self.secure: bool = secure
         self.base_path: str = f"http{'s' if self.secure else ''}://{self.hostname}/"
+        self.limits: httpx.Limits = limits or httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._endpoint: Optional[str] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._endpoint is None:
+            self._endpoint = f"http{'s' if self.secure else ''}://{self.hostname}"
+            if self._endpoint not in self.clients:
+                self.clients[self._endpoint] = {"client": httpx.AsyncClient(verify=False, limits=self.limits), "refs": 0}
+            self.clients[self._endpoint]["refs"] += 1
+        return self.clients[self._endpoint]["client"]
+
+    async def close(self) -> None:
+        endpoint, self._endpoint = self._endpoint, None
+        if endpoint is not None and endpoint in self.clients:
+            pooled = self.clients[endpoint]
+            pooled["refs"] -= 1
+            if pooled["refs"] <= 0:
+                del self.clients[endpoint]
+                await pooled["client"].aclose()
+
+    @classmethod
+    async def close_all(cls) -> None:
+        for pooled in list(cls.clients.values()):
+            await pooled["client"].aclose()
+        cls.clients.clear()
+
+    async def probe(self) -> bool:
+        return await net.tcp_probe(self.hostname, 443 if self.secure else 80)
 
 
 class Json(Http):
+    async def request(self, method: str, path: str, timeout: int = 10, **kwargs) -> httpx.Response:
+        return await self.client.request(
+            method,
+            self.base_path + path,
+            auth=(self.username, self.password),
+            timeout=timeout,
+            follow_redirects=True,
+            **kwargs,
+        )
+
     async def get(self, path: str, timeout: int = 10) -> Dict[str, Any]:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(
-                self.base_path + path,
-                auth=(self.username, self.password),
-                timeout=timeout,
-                follow_redirects=True,
-            )
-            return response.json()
+        response = await self.request("GET", path, timeout=timeout)
+        return response.json()
 
     async def patch(self, path: str, payload: Dict[str, Any], timeout: int = 10) -> Dict[str, Any]:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.patch(
-                self.base_path + path,
-                json=payload,
-                headers={"content-type": "application/json"},
-                auth=(self.username, self.password),
-                timeout=timeout,
-                follow_redirects=True,
-            )
-            return response.json()
+        response = await self.request("PATCH", path, timeout=timeout, json=payload, headers={"content-type": "application/json"})
+        return response.json()
 
     async def post(self, path: str, payload: Dict[str, Any], timeout: int = 10) -> Dict[str, Any]:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(
-                self.base_path + path,
-                json=payload,
-                auth=(self.username, self.password),
-                timeout=timeout,
+        response = await self.request("POST", path, timeout=timeout, json=payload)
+        return response.json()
+
+
+class Redfish(Json):
+    session_path: str = "SessionService/Sessions"
+    default_session_timeout: float = 1800
+    unsupported_retry: float = 3600
+    sessions: Dict[str, Dict[str, Any]] = {}
+
+    def __init__(self, hostname: str, username: str, password: Optional[str] = None, secure: bool = True, limits: Optional[httpx.Limits] = None):
+        super().__init__(hostname, username, password, secure, limits)
+        self.base_path = f"{self.base_path}redfish/v1/"
+        self._session_key: Optional[str] = None
+
+    @property
+    def session(self) -> Dict[str, Any]:
+        if self._session_key is None:
+            self._session_key = f"{self.base_path}@{self.username}"
+            if self._session_key not in self.sessions:
+                self.sessions[self._session_key] = {
+                    "token": None,
+                    "uri": None,
+                    "timeout": self.default_session_timeout,
+                    "last_used": 0,
+                    "unsupported_until": 0,
+                    "refs": 0,
+                    "lock": asyncio.Lock(),
+                }
+            self.sessions[self._session_key]["refs"] += 1
+        return self.sessions[self._session_key]
+
+    async def login(self, stale: Optional[str] = None) -> Optional[str]:
+        session = self.session
+        async with session["lock"]:
+            if session["token"] is not None and session["token"] != stale and not self._expiring(session):
+                return session["token"]
+            if self._unsupported(session):
+                return None
+            await self._logout(session)
+            response = await self.client.post(
+                self.base_path + self.session_path,
+                json={"UserName": self.username, "Password": self.password},
+                timeout=10,
                 follow_redirects=True,
             )
-            return response.json()
+            token = response.headers.get("X-Auth-Token", None)
+            if response.status_code >= 400 or token is None:
+                logger.warning(f"{self.hostname} refused a Redfish session ({response.status_code}), using basic authentication.")
+                session["unsupported_until"] = time.monotonic() + self.unsupported_retry
+                return None
+            session["token"] = token
+            session["uri"] = response.headers.get("Location", None)
+            session["last_used"] = time.monotonic()
+            try:
+                service = await self.client.get(self.base_path + "SessionService", headers={"X-Auth-Token": token}, timeout=10, follow_redirects=True)
+                session["timeout"] = float(service.json().get("SessionTimeout", self.default_session_timeout))
+            except Exception as e:
+                session["timeout"] = self.default_session_timeout
+            logger.info(f"{self.hostname} Redfish session created.")
+            return token
+
+    async def request(self, method: str, path: str, timeout: int = 10, **kwargs) -> httpx.Response:
+        session = self.session
+        headers = kwargs.pop("headers", {})
+        if self._unsupported(session):
+            return await super().request(method, path, timeout=timeout, headers=headers, **kwargs)
+        token = session["token"]
+        if token is None or self._expiring(session):
+            token = await self.login()
+        if token is None:
+            return await super().request(method, path, timeout=timeout, headers=headers, **kwargs)
+        response = await self.client.request(method, self.base_path + path, headers={**headers, "X-Auth-Token": token}, timeout=timeout, follow_redirects=True, **kwargs)
+        if response.status_code == 401:
+            token = await self.login(stale=token)
+            if token is None:
+                return await super().request(method, path, timeout=timeout, headers=headers, **kwargs)
+            response = await self.client.request(method, self.base_path + path, headers={**headers, "X-Auth-Token": token}, timeout=timeout, follow_redirects=True, **kwargs)
+        session["last_used"] = time.monotonic()
+        return response
+
+    async def close(self) -> None:
+        key, self._session_key = self._session_key, None
+        if key is not None and key in self.sessions:
+            session = self.sessions[key]
+            session["refs"] -= 1
+            if session["refs"] <= 0:
+                del self.sessions[key]
+                await self._logout(session)
+        await super().close()
+
+    async def _logout(self, session: Dict[str, Any]) -> None:
+        token, uri = session["token"], session["uri"]
+        session["token"] = None
+        session["uri"] = None
+        if token is not None and uri is not None:
+            if not uri.startswith("http"):
+                uri = f"http{'s' if self.secure else ''}://{self.hostname}{uri}"
+            try:
+                await self.client.delete(uri, headers={"X-Auth-Token": token}, timeout=10)
+            except Exception as e:
+                logger.info(f"{self.hostname} failed to delete Redfish session: {e}")
+
+    @staticmethod
+    def _unsupported(session: Dict[str, Any]) -> bool:
+        # BMCs without a session service get basic authentication until the retry time, then login is tried again.
+        return time.monotonic() < session["unsupported_until"]
+
+    @staticmethod
+    def _expiring(session: Dict[str, Any]) -> bool:
+        # Redfish session timeouts are inactivity based, renew well before the BMC drops it.
+        return time.monotonic() - session["last_used"] > 0.8 * session["timeout"]
 
 
 class Xml(Http):
     async def post(self, data: str, timeout: int = 20) -> Dict[str, Any]:
         logger.debug(f"XML Post -> {data}")
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(
-                self.base_path,
-                content=data,
-                timeout=timeout,
-            )
-            logger.debug(f"XML Post <- {response.text}")
-            return xmltodict.parse(response.text)
+        response = await self.client.post(
+            self.base_path,
+            content=data,
+            timeout=timeout,
+        )
+        logger.debug(f"XML Post <- {response.text}")
+        return xmltodict.parse(response.text)
@@ -1,13 +1,22 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Literal
-from hush.interfaces import cli
+from typing import Any, Dict, List, Literal, Tuple
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+import time
+from hush.interfaces import cli, net
 
 
 class IpmiTool(cli.Cli):
-    def __init__(self, hostname: str, username: str, password: str, interface: Literal["lanplus", "lan"] = "lanplus"):
+    sdr_cache_lifetime: float = 3600
+    sdr_caches: Dict[str, Dict[str, Any]] = {}
+
+    def __init__(self, hostname: str, username: str, password: str, interface: Literal["lanplus", "lan"] = "lanplus", path: str = "data"):
         super().__init__()
+        self._sdr_path: Path = Path(path).resolve() / "sdr"
         self._hostname: str = hostname
         self._username: str = username
         self._password: str = password
@@ -21,3 +30,48 @@ class IpmiTool(cli.Cli):
             logger.error(f"{self._hostname} failed to run_cmd {command}")
             raise Exception
         return result
+
+    async def fingerprint(self) -> str:
+        mc = await self.execute("mc info")
+        try:
+            fru = (await self.execute("fru print 0")).stdout
+        except Exception:
+            fru = ""
+        return hashlib.sha1((mc.stdout + fru).encode("utf-8")).hexdigest()
+
+    async def sdr_cache(self) -> str:
+        cache = self.sdr_caches.get(self._hostname, None)
+        if cache is None or time.time() - cache["timestamp"] > self.sdr_cache_lifetime:
+            path = self._sdr_path / f"{self._hostname}.sdr"
+            fingerprint_path = self._sdr_path / f"{self._hostname}.fingerprint"
+            fingerprint = await self.fingerprint()
+            stored = await asyncio.to_thread(fingerprint_path.read_text) if fingerprint_path.exists() else ""
+            if not path.exists() or stored != fingerprint:
+                self._sdr_path.mkdir(parents=True, exist_ok=True)
+                await self.execute(f"sdr dump {path}.tmp")
+                os.replace(f"{path}.tmp", path)
+                await asyncio.to_thread(fingerprint_path.write_text, fingerprint)
+                logger.info(f"{self._hostname} SDR cache refreshed.")
+            cache = {"path": str(path), "timestamp": time.time()}
+            self.sdr_caches[self._hostname] = cache
+        return cache["path"]
+
+    async def sdr(self) -> List[Tuple[str, float]]:
+        path = await self.sdr_cache()
+        try:
+            result = await self.execute(f"-S {path} -c sdr type Temperature")
+        except Exception as e:
+            self.sdr_caches.pop(self._hostname, None)
+            raise e
+        readings = []
+        for line in result.stdout_lines:
+            data = line.strip().rsplit(",", 4)
+            if len(data) == 5 and data[4] != "":
+                try:
+                    readings.append((data[0], float(data[4].split()[0])))
+                except ValueError:
+                    continue
+        return readings
+
+    async def probe(self) -> bool:
+        return await net.rmcp_probe(self._hostname)
@@ -0,0 +1,49 @@
+import logging
+
+logger = logging.getLogger(__name__)
+import asyncio
+import contextlib
+
+# RMCP/ASF presence ping, IPMI v2.0 section 13.2.3.
+RMCP_PRESENCE_PING = bytes([0x06, 0x00, 0xFF, 0x06, 0x00, 0x00, 0x11, 0xBE, 0x80, 0x00, 0x00, 0x00])
+
+
+class _Datagram(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.response: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.response.done():
+            self.response.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+async def tcp_probe(hostname: str, port: int, timeout: float = 2) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(hostname, port), timeout)
+        writer.close()
+        with contextlib.suppress(Exception):
+            await writer.wait_closed()
+        return True
+    except Exception as e:
+        logger.debug(f"{hostname}:{port} tcp probe failed: {e}")
+        return False
+
+
+async def rmcp_probe(hostname: str, port: int = 623, timeout: float = 2) -> bool:
+    transport = None
+    try:
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(_Datagram, remote_addr=(hostname, port))
+        transport.sendto(RMCP_PRESENCE_PING)
+        await asyncio.wait_for(protocol.response, timeout)
+        return True
+    except Exception as e:
+        logger.debug(f"{hostname}:{port} rmcp probe failed: {e}")
+        return False
+    finally:
+        if transport is not None:
+            transport.close()
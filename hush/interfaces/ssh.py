@@ -1,21 +1,85 @@
+import logging
+
+logger = logging.getLogger(__name__)
 from typing import Dict, Optional, Union
+import asyncio
 import os
 from pathlib import Path
-from hush.interfaces import cli
+import tempfile
+from hush.interfaces import cli, net
+
+
+class ConfigStore:
+    stores: Dict[str, "ConfigStore"] = {}
+
+    @classmethod
+    def get(cls, path: Union[str, Path]) -> "ConfigStore":
+        path = str(Path(path).resolve())
+        if path not in cls.stores:
+            cls.stores[path] = cls(path)
+        return cls.stores[path]
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.hosts: Dict[str, Dict[str, str]] = {}
+        self._written: str = ""
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._written = f.read()
+        except FileNotFoundError:
+            pass
+        current_host = None
+        for line in self._written.splitlines():
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            if line.startswith("Host "):
+                current_host = line.split(" ", 1)[1].strip().replace('"', "")
+                self.hosts[current_host] = {}
+            elif current_host is not None:
+                key, value = line.split(" ", 1)
+                self.hosts[current_host][key.strip()] = value.strip()
+
+    def render(self) -> str:
+        text = ""
+        for host, config in self.hosts.items():
+            text += f"Host {host}\n"
+            for key, value in config.items():
+                text += f"    {key} {value}\n"
+            text += "\n"
+        return text
+
+    def save(self) -> None:
+        if self.render() == self._written:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self.render())
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self.flush())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            # save() does not schedule another flush while this one runs, so keep writing until nothing changed meanwhile.
+            text = self.render()
+            while text != self._written:
+                await asyncio.to_thread(self._write, text)
+                text = self.render()
+
+    def _write(self, text: str) -> None:
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+        self._written = text
 
 
 def get_hosts(path: str = "data"):
-    path = f"{Path(path).resolve()}/config"
-    hosts = []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            for line in lines:
-                if line.startswith("Host "):
-                    hosts.append(line.split(" ")[1].strip())
-        return hosts
-    except FileNotFoundError:
-        return []
+    return list(ConfigStore.get(f"{Path(path).resolve()}/config").hosts.keys())
 
 
 async def get_public_key(path: str = "data") -> str:
@@ -36,8 +100,11 @@ class Ssh(cli.Cli):
         options: Optional[Dict[str, str]] = None,
         path: str = "data",
         seperator: bytes = b"\n",
+        multiplex: bool = True,
     ) -> None:
         super().__init__(seperator=seperator)
+        self.multiplex: bool = multiplex
+        self._control_path: Path = Path(tempfile.gettempdir()) / "hush-ssh"
         self._raw_path: str = path
         self._path: Path = Path(path).resolve()
         self.host: str = host.replace(" ", "")
@@ -57,29 +124,10 @@ class Ssh(cli.Cli):
         self.set_config()
 
     def read_config(self) -> None:
-        try:
-            with open(self._config_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                for line in lines:
-                    line = line.strip()
-                    if line == "" or line.startswith("#"):
-                        continue
-                    if line.startswith("Host "):
-                        current_host = line.split(" ", 1)[1].strip().replace('"', "")
-                        self._config[current_host] = {}
-                    else:
-                        key, value = line.split(" ", 1)
-                        self._config[current_host][key.strip()] = value.strip()
-        except FileNotFoundError:
-            self._config = {}
+        self._config = ConfigStore.get(self._config_path).hosts
 
     def write_config(self) -> None:
-        with open(self._config_path, "w", encoding="utf-8") as f:
-            for host, config in self._config.items():
-                f.write(f"Host {host}\n")
-                for key, value in config.items():
-                    f.write(f"    {key} {value}\n")
-                f.write("\n")
+        ConfigStore.get(self._config_path).save()
 
     def set_config(self) -> None:
         self._config[self.host] = {
@@ -100,13 +148,43 @@ class Ssh(cli.Cli):
         del self._config[self.host]
         self.write_config()
 
-    async def execute(self, command: str, max_output_lines: int = 0) -> cli.Result:
+    async def prepare(self) -> None:
+        await ConfigStore.get(self._config_path).flush()
+        if self.multiplex is True and not self._control_path.exists():
+            await asyncio.to_thread(self._control_path.mkdir, mode=0o700, exist_ok=True)
+
+    async def execute(self, command: str, max_output_lines: int = 0, timeout: Optional[float] = None, parser: Optional[cli.Parser] = None) -> cli.Result:
+        await self.prepare()
         self._full_command = f"{self.base_command} {command}"
-        return await super().execute(self._full_command, max_output_lines)
+        result = await super().execute(self._full_command, max_output_lines, timeout, parser)
+        if await self._reconnect(result) is True:
+            result = await super().execute(self._full_command, max_output_lines, timeout, parser)
+        return result
 
-    async def shell(self, command: str, max_output_lines: int = 0) -> cli.Result:
+    async def shell(self, command: str, max_output_lines: int = 0, timeout: Optional[float] = None, parser: Optional[cli.Parser] = None) -> cli.Result:
+        await self.prepare()
         self._full_command = f"{self.base_command} {command}"
-        return await super().shell(self._full_command, max_output_lines)
+        result = await super().shell(self._full_command, max_output_lines, timeout, parser)
+        if await self._reconnect(result) is True:
+            result = await super().shell(self._full_command, max_output_lines, timeout, parser)
+        return result
+
+    async def check(self) -> bool:
+        if self.multiplex is False:
+            return False
+        result = await super().shell(f"ssh -F {self._config_path} {self.multiplex_options} -O check {self.host}")
+        return result.return_code == 0
+
+    async def _reconnect(self, result: cli.Result) -> bool:
+        # ssh exits with 255 on connection errors, a stale master socket is dropped and the command retried once.
+        if self.multiplex is False or result.return_code != 255 or await self.check() is True:
+            return False
+        logger.info(f"{self.host} ssh master connection lost, reconnecting.")
+        await super().shell(f"ssh -F {self._config_path} {self.multiplex_options} -O exit {self.host}")
+        return True
+
+    async def probe(self) -> bool:
+        return await net.tcp_probe(self.hostname or self.host, int(self._config.get(self.host, {}).get("Port", 22)))
 
     async def send_key(self) -> cli.Result:
         await get_public_key(self._raw_path)
@@ -117,7 +195,13 @@ class Ssh(cli.Cli):
     def config_path(self):
         return self._config_path
 
+    @property
+    def multiplex_options(self) -> str:
+        if self.multiplex is False:
+            return ""
+        return f"-o ControlMaster=auto -o ControlPath={self._control_path}/%C -o ControlPersist=600 -o ServerAliveInterval=15 -o ServerAliveCountMax=3"
+
     @property
     def base_command(self):
-        self._base_command = f'{"" if self.use_key else f"sshpass -p {self.password} "} ssh -F {self._config_path} {self.host}'
+        self._base_command = f'{"" if self.use_key else f"sshpass -p {self.password} "} ssh -F {self._config_path} {self.multiplex_options} {self.host}'
         return self._base_command
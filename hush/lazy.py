@@ -0,0 +1,17 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def module(name: str) -> ModuleType:
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    lazy_module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = lazy_module
+    loader.exec_module(lazy_module)
+    return lazy_module
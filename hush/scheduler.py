@@ -0,0 +1,104 @@
+import logging
+
+logger = logging.getLogger(__name__)
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from hush import storage
+
+
+class Scheduler:
+    heap: List[Tuple[float, int, str]] = []
+    deadlines: Dict[str, Tuple[float, int]] = {}
+    last_deadlines: Dict[str, float] = {}
+    missed: Dict[str, int] = {}
+    _counter = itertools.count()
+    _wake: asyncio.Event = asyncio.Event()
+
+    @classmethod
+    def delay(cls, host: str) -> Optional[float]:
+        if host not in storage.hosts:
+            return None
+        config = storage.hosts[host]
+        if config.get("speed", "") == "Shared":
+            return None
+        delay = config.get("delay", 30)
+        if delay is None or delay <= 0:
+            return None
+        return float(delay)
+
+    @classmethod
+    def schedule(cls, host: str, deadline: float) -> None:
+        entry = (deadline, next(cls._counter))
+        cls.deadlines[host] = entry
+        heapq.heappush(cls.heap, (*entry, host))
+        if len(cls.heap) > 2 * len(cls.deadlines) + 64:
+            cls.heap = [(*e, h) for h, e in cls.deadlines.items()]
+            heapq.heapify(cls.heap)
+        if cls.heap[0][1] == entry[1]:
+            cls._wake.set()
+
+    @classmethod
+    def reschedule(cls, host: str) -> None:
+        delay = cls.delay(host)
+        if delay is None:
+            cls.deadlines.pop(host, None)
+            return
+        if host in cls.last_deadlines:
+            deadline = cls.last_deadlines[host] + delay
+        else:
+            deadline = time.monotonic()
+        cls.schedule(host, deadline)
+
+    @classmethod
+    def reschedule_all(cls) -> None:
+        for host in list(storage.hosts.keys()):
+            cls.reschedule(host)
+
+    @classmethod
+    def remove(cls, host: str) -> None:
+        cls.deadlines.pop(host, None)
+        cls.last_deadlines.pop(host, None)
+        cls.missed.pop(host, None)
+
+    @classmethod
+    def completed(cls, host: str, deadline: float, interval: Optional[float] = None) -> None:
+        cls.last_deadlines[host] = deadline
+        delay = cls.delay(host)
+        if delay is None:
+            return
+        if interval is not None:
+            delay = interval
+        now = time.monotonic()
+        next_deadline = deadline + delay
+        if next_deadline < now:
+            cls.missed[host] = cls.missed.get(host, 0) + 1
+            logger.warning(f"{host} missed its control deadline by {now - next_deadline:.1f}s ({cls.missed[host]} total).")
+            next_deadline = now
+        cls.schedule(host, next_deadline)
+
+    @classmethod
+    async def due(cls) -> List[Tuple[str, float]]:
+        while True:
+            cls._wake.clear()
+            while cls.heap and cls.deadlines.get(cls.heap[0][2]) != cls.heap[0][:2]:
+                heapq.heappop(cls.heap)
+            if not cls.heap:
+                await cls._wake.wait()
+                continue
+            timeout = cls.heap[0][0] - time.monotonic()
+            if timeout > 0:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(cls._wake.wait(), timeout)
+                continue
+            hosts = []
+            now = time.monotonic()
+            while cls.heap and cls.heap[0][0] <= now:
+                deadline, count, host = heapq.heappop(cls.heap)
+                if cls.deadlines.get(host) == (deadline, count):
+                    del cls.deadlines[host]
+                    hosts.append((host, deadline))
+            return hosts
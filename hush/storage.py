@@ -1,7 +1,7 @@
 import logging
 
 logger = logging.getLogger(__name__)
-from typing import Dict, Literal
+from typing import Dict, List, Literal
 from nicegui import app
 
 configs_version = int(102)
@@ -47,6 +47,75 @@ for h in hosts:
     if "consumer" not in hosts[h]:
         hosts[h]["consumer"] = {}
 
+versions: Dict[str, int] = {}
+shared_parents: Dict[str, str] = {}
+shared_dependents: Dict[str, List[str]] = {}
+
+
+def _rebuild_shared_dependents() -> None:
+    global shared_dependents
+    children: Dict[str, List[str]] = {}
+    for child, parent in shared_parents.items():
+        children.setdefault(parent, []).append(child)
+    dependents: Dict[str, List[str]] = {}
+    for parent in children:
+        seen = {parent}
+        pending = list(children[parent])
+        dependents[parent] = []
+        while pending:
+            child = pending.pop(0)
+            if child not in seen:
+                seen.add(child)
+                dependents[parent].append(child)
+                pending.extend(children.get(child, []))
+    shared_dependents = dependents
+
+
+def _index_shared_parent(name: str) -> None:
+    config = hosts.get(name, None)
+    if config is not None and config.get("speed", "None") == "Shared" and config.get("shared", {}).get("speed", None):
+        shared_parents[name] = config["shared"]["speed"]
+    else:
+        shared_parents.pop(name, None)
+
+
+def index_shared(name: str) -> None:
+    _index_shared_parent(name)
+    _rebuild_shared_dependents()
+
+
+def unindex_shared(name: str) -> None:
+    shared_parents.pop(name, None)
+    _rebuild_shared_dependents()
+
+
+def dependents(name: str) -> List[str]:
+    return shared_dependents.get(name, [])
+
+
+def shared_controller(name: str, group: str = "speed") -> str:
+    seen = set()
+    while name in hosts and hosts[name].get(group, "None") == "Shared" and name not in seen:
+        seen.add(name)
+        parent = hosts[name].get("shared", {}).get(group, None)
+        if not parent:
+            break
+        name = parent
+    return name
+
+
+for h in hosts:
+    _index_shared_parent(h)
+_rebuild_shared_dependents()
+
+
+def touch(name: str) -> None:
+    versions[name] = versions.get(name, 0) + 1
+
+
+def version(name: str) -> int:
+    return versions.get(name, 0)
+
 
 def host(name: str) -> dict:
     if name and name not in hosts:
@@ -136,6 +205,25 @@ def curve_temp(host_name: str, sensor: str, default=None) -> dict:
     return c["temp"]
 
 
+interval_defaults: Dict[str, float] = {"cpu": 0, "pci": 0, "drive": 300, "gpu": 0, "chassis": 60}
+
+
+def interval(host_name: str, sensor: str) -> float:
+    h = host(host_name)
+    if "interval" not in h:
+        h["interval"] = {}
+    if sensor not in h["interval"]:
+        h["interval"][sensor] = interval_defaults.get(sensor, 0)
+    return h["interval"][sensor]
+
+
+def adaptive(host_name: str) -> dict:
+    h = host(host_name)
+    if "adaptive" not in h:
+        h["adaptive"] = {"enabled": False, "min": 10, "max": 120}
+    return h["adaptive"]
+
+
 def pid(host_name: str, sensor: str) -> Dict[str, float]:
     s = algo_sensor(host_name, sensor)
     if "pid" not in s:
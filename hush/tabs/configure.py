@@ -7,6 +7,7 @@ from . import Tab
 import hush.elements as el
 from hush import storage
 from hush.hardware.factory import Factory
+from hush.scheduler import Scheduler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -104,6 +105,41 @@ class Configure(Tab):
                 value=storage.host(self.host).get("delay", 30),
                 on_change=lambda e: self._store_delay(e.value),
             ).classes("col")
+        with el.WRow():
+            el.Help(
+                "Sets the minimum time in seconds between samples of each temperature sensor, 0 samples on every control cycle. "
+                "Between samples the last reading is reused, slow changing and expensive sensors like drives can be sampled less often."
+            )
+            labels = {"cpu": "CPU Interval", "pci": "PCI Interval", "drive": "Drive Interval", "gpu": "GPU Interval", "chassis": "Chassis Interval"}
+            for group, label in labels.items():
+                ui.number(
+                    label,
+                    value=storage.interval(self.host, group),
+                    min=0,
+                    on_change=lambda e, group=group: self._store_interval(group, e.value),
+                ).classes("col")
+        with el.WRow():
+            el.Help(
+                "Replaces the fixed delay with an interval that follows the rate of change of the temperatures. "
+                "Rising temperatures or temperatures close to a curve breakpoint or PID target shorten it toward the minimum, flat temperatures stretch it toward the maximum."
+            )
+            ui.checkbox(
+                "Adaptive",
+                value=storage.adaptive(self.host)["enabled"],
+                on_change=lambda e: self._store_adaptive("enabled", e.value),
+            )
+            ui.number(
+                "Adaptive Min",
+                value=storage.adaptive(self.host)["min"],
+                min=1,
+                on_change=lambda e: self._store_adaptive("min", e.value),
+            ).classes("col")
+            ui.number(
+                "Adaptive Max",
+                value=storage.adaptive(self.host)["max"],
+                min=1,
+                on_change=lambda e: self._store_adaptive("max", e.value),
+            ).classes("col")
         with el.WRow():
             self._select["speed"] = ui.select(
                 speed_ctrl_names,
@@ -198,9 +234,21 @@ class Configure(Tab):
 
     async def _store_delay(self, value):
         storage.host(self.host)["delay"] = value
+        Scheduler.reschedule(self.host)
+
+    async def _store_interval(self, group, value):
+        storage.interval(self.host, group)
+        storage.host(self.host)["interval"][group] = value
+        storage.touch(self.host)
+
+    async def _store_adaptive(self, key, value):
+        storage.adaptive(self.host)[key] = value
+        Scheduler.reschedule(self.host)
 
     async def _store_select(self, group, value):
         storage.host(self.host)[group] = value
+        storage.touch(self.host)
+        storage.index_shared(self.host)
         if group == "speed" and "algo" in storage.host(self.host):
             del storage.host(self.host)["algo"]
         if group == "chassis" and "algo" in storage.host(self.host) and "chassis" in storage.algo(self.host):
@@ -212,6 +260,7 @@ class Configure(Tab):
         await self._build_supermicro_ctrl(group)
         await self._build_consumer_ctrl(group)
         await Factory.close(self.host, group)
+        Scheduler.reschedule(self.host)
         self._control_rebuild()
 
     async def _build_ilo4_ctrl(self, group):
@@ -244,20 +293,27 @@ class Configure(Tab):
                 self._ilo4[group].visible = False
 
     async def _build_smart_ctrl(self):
-        if self._select["drive"].value == "SMART Discrete":
+        if self._select["drive"].value in ["SMART All", "SMART Discrete"]:
             self._skeleton["drive"].visible = True
             self._smart["drive"].clear()
             with self._smart["drive"]:
-                await Factory.close(self.host, "drive")
-                device = await Factory.driver(self.host, "drive")
-                options = await device.get_drive_list()
-                ui.select(
-                    options,
-                    label="SMART Drives",
-                    value=storage.host(self.host)["smart"].get("drive", []),
-                    on_change=lambda e: self._store_select_smart("drive", e.value),
-                    multiple=True,
-                ).classes("col")
+                if self._select["drive"].value == "SMART Discrete":
+                    await Factory.close(self.host, "drive")
+                    device = await Factory.driver(self.host, "drive")
+                    options = await device.get_drive_list()
+                    ui.select(
+                        options,
+                        label="SMART Drives",
+                        value=storage.host(self.host)["smart"].get("drive", []),
+                        on_change=lambda e: self._store_select_smart("drive", e.value),
+                        multiple=True,
+                    ).classes("col")
+                el.Help("Checks the power state first and does not wake drives in standby, their last reading is reused and they are treated as cool.")
+                ui.checkbox(
+                    "Skip Sleeping Drives",
+                    value=storage.host(self.host)["smart"].get("standby", False),
+                    on_change=lambda e: self._store_smart_standby(e.value),
+                )
             self._skeleton["drive"].visible = False
             self._smart["drive"].visible = True
         else:
@@ -381,6 +437,10 @@ class Configure(Tab):
         storage.host(self.host)["smart"][group] = value
         await Factory.close(self.host, group)
 
+    async def _store_smart_standby(self, value):
+        storage.host(self.host)["smart"]["standby"] = value
+        await Factory.close(self.host, "drive")
+
     async def _store_select_idrac(self, group, value):
         storage.host(self.host)["idrac"][group] = value
         if "algo" in storage.host(self.host) and "chassis" in storage.algo(self.host):
@@ -390,6 +450,7 @@ class Configure(Tab):
 
     async def _store_select_shared(self, group, value):
         storage.host(self.host)["shared"][group] = value
+        storage.index_shared(self.host)
         await Factory.close(self.host, group)
 
     async def _store_select_supermicro(self, group, value):
@@ -420,6 +481,9 @@ class Configure(Tab):
             logger.error(f"Import error occurred: {e}")
         if content:
             storage.host(self.host).update(deepcopy(content))
+            storage.touch(self.host)
+            storage.index_shared(self.host)
+            Scheduler.reschedule(self.host)
             self.selection_container.clear()
             with self.selection_container:
                 self._add_selections()
@@ -9,7 +9,7 @@ import json
 import httpx
 from nicegui import app, ui  # type: ignore
 from . import Tab
-from hush.storage import host, algo_sensor, curve_speed, curve_temp, pid_coefficient
+from hush.storage import host, algo_sensor, curve_speed, curve_temp, pid_coefficient, shared_controller, touch
 
 
 class Control(Tab):
@@ -34,11 +34,8 @@ class Control(Tab):
                 with control_panels:
                     with ui.tab_panel(tab).classes("w-full"):
                         with ui.column().classes("w-full flex-center") as column:
-                            ctrl_host = self.host
-                            ctrl_type = host(self.host).get("speed", "None")
-                            if ctrl_type == "Shared":
-                                ctrl_host = host(self.host)["shared"]["speed"]
-                                ctrl_type = host(ctrl_host).get("speed", "None")
+                            ctrl_host = shared_controller(self.host)
+                            ctrl_type = host(ctrl_host).get("speed", "None")
                             if ctrl_type == "Dell iDRAC 9":
                                 iDrac9Control(self.host, sensor, column)
                             elif ctrl_type == "Cisco M3" or ctrl_type == "Cisco M4":
@@ -70,6 +67,7 @@ class PwmControl:
 
     def _set_algo(self, v):
         algo_sensor(self.host, self._sensor)["type"] = v.value
+        touch(self.host)
         self._card.clear()
         self._add_control()
 
@@ -108,6 +106,7 @@ class PwmControl:
 
     def _store_pid(self, parameter, value):
         host(self.host)["algo"][self._sensor]["pid"][parameter] = value
+        touch(self.host)
 
     def _add_curve(self):
         options = self._chart_options
@@ -157,6 +156,7 @@ class PwmControl:
         temps, speeds = zip(*curve)
         curve_speed(self.host, self._sensor).update(dict(zip(self._levels, list(speeds))))
         curve_temp(self.host, self._sensor).update(dict(zip(self._levels, list(temps))))
+        touch(self.host)
         if self._chart is not None:
             self._chart.options["series"][0] = self._chart_options["series"][0]
             self._chart.update()
@@ -238,6 +238,7 @@ class ModeControl(PwmControl):
         temps, speeds = zip(*curve)
         curve_speed(self.host, self._sensor).update(dict(zip(self._levels, self._modes)))
         curve_temp(self.host, self._sensor).update(dict(zip(self._levels, list(temps))))
+        touch(self.host)
         if self._chart is not None:
             self._chart.options["series"][0] = self._chart_options["series"][0]
             self._chart.update()
@@ -1,16 +1,17 @@
 from typing import Dict, Optional
 from dataclasses import dataclass, field
-from collections import deque
 import asyncio
 from datetime import datetime
 import time
 from nicegui import ui
+from hush.breaker import Breaker
+from hush.history import History
 from . import Tab
 
 
-last_status: dict = {}
-status_history: dict = {}
-fan_speed_history: dict = {}
+last_status: Dict[str, "Status"] = {}
+status_history: Dict[str, History] = {}
+fan_speed_history: Dict[str, History] = {}
 
 
 @dataclass(kw_only=False)
@@ -19,48 +20,41 @@ class Status:
     status: bool = False
     speed: Optional[int] = None
     temperatures: Dict[str, float] = field(default_factory=dict)
+    details: Dict[str, str] = field(default_factory=dict)
+    interval: Optional[float] = None
     timestamp: float = field(default_factory=time.time)
 
     def submit(self) -> None:
         if self.status is True:
             if self.host not in status_history:
-                status_history[self.host] = {}
-            if (len(self.temperatures.keys()) + 1) != len(status_history[self.host].keys()):
-                status_history[self.host] = {}
-                for sensor in self.temperatures.keys():
-                    status_history[self.host][sensor] = deque(maxlen=100)
-                status_history[self.host]["speed"] = deque(maxlen=100)
-            for sensor, value in self.temperatures.items():
-                status_history[self.host][sensor].append(value)
-            status_history[self.host]["speed"].append(self.speed)
+                status_history[self.host] = History()
+            status_history[self.host].append(self.timestamp, {**self.temperatures, "speed": self.speed})
         last_status[self.host] = self
 
     @classmethod
     def clear(cls, host):
-        if host in status_history:
-            status_history[host] = {}
+        status_history.pop(host, None)
 
 
 @dataclass(kw_only=False)
 class FanSpeeds:
     host: str
     speeds: Dict[str, int] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
 
     def submit(self) -> None:
         if self.host not in fan_speed_history:
-            fan_speed_history[self.host] = {}
-        for sensor, value in self.speeds.items():
-            if sensor not in fan_speed_history[self.host]:
-                fan_speed_history[self.host][sensor] = deque(maxlen=100)
-            fan_speed_history[self.host][sensor].append(value)
+            fan_speed_history[self.host] = History()
+        fan_speed_history[self.host].append(self.timestamp, self.speeds)
 
     @classmethod
     def clear(cls, host):
-        if host in fan_speed_history:
-            fan_speed_history[host] = {}
+        fan_speed_history.pop(host, None)
 
 
 class Monitor(Tab):
+    history_window: float = 3600
+
     def __init__(self, host=None) -> None:
         self._status = None
         self._timestamp = 0
@@ -74,6 +68,10 @@ class Monitor(Tab):
     def _add_labels(self):
         self._status = ui.label("Connection Failure").classes("text-4xl font-bold self-center text-orange-500")
         self._status.set_visibility(False)
+        self._breaker = ui.label("").classes("text-xl self-center text-orange-500")
+        self._breaker.set_visibility(False)
+        self._details = ui.label("").classes("text-lg self-center")
+        self._details.set_visibility(False)
 
     def _add_chart(self):
         self._status_chart = ui.highchart(
@@ -84,9 +82,11 @@ class Monitor(Tab):
                     "type": "line",
                     "backgroundColor": "#222",
                 },
+                "time": {"useUTC": False},
                 "xAxis": {
+                    "type": "datetime",
                     "title": {"text": None},
-                    "labels": {"enabled": False},
+                    "labels": {"style": {"color": "#FFF"}},
                     "lineColor": "#FFF",
                     "tickColor": "#FFF",
                 },
@@ -112,9 +112,11 @@ class Monitor(Tab):
                     "type": "line",
                     "backgroundColor": "#222",
                 },
+                "time": {"useUTC": False},
                 "xAxis": {
+                    "type": "datetime",
                     "title": {"text": None},
-                    "labels": {"enabled": False},
+                    "labels": {"style": {"color": "#FFF"}},
                     "lineColor": "#FFF",
                     "tickColor": "#FFF",
                 },
@@ -137,16 +139,25 @@ class Monitor(Tab):
         while True:
             if self._status_chart.is_deleted is True:
                 break
+            breakers = Breaker.describe(self.host)
+            self._breaker.text = ", ".join(breakers)
+            self._breaker.set_visibility(len(breakers) > 0)
             if self.host in last_status:
                 if last_status[self.host].timestamp > self._timestamp:
                     self._timestamp = last_status[self.host].timestamp
                     time = datetime.fromtimestamp(self._timestamp).strftime("%m/%d/%Y @ %H:%M:%S")
                     self._status.set_visibility(False if last_status[self.host].status is True else True)
                     self._status_chart.options["subtitle"]["text"] = f"Last Update: {time}"
+                    if last_status[self.host].interval is not None:
+                        self._status_chart.options["subtitle"]["text"] += f", Next Update In: {last_status[self.host].interval:.0f}s"
+                    details = last_status[self.host].details
+                    self._details.text = ", ".join(f"{name}: {detail}" for name, detail in details.items())
+                    self._details.set_visibility(len(details) > 0)
                     if self.host in status_history and last_status[self.host].status is True:
+                        history = status_history[self.host]
                         for group in self._groups:
-                            if group in status_history[self.host]:
-                                self._status_chart.options["series"][self._groups.index(group)]["data"] = list(status_history[self.host][group])
+                            if group in history.columns:
+                                self._status_chart.options["series"][self._groups.index(group)]["data"] = history.chart(group, self.history_window)
                             else:
                                 self._status_chart.options["series"][self._groups.index(group)]["data"] = None
                         self._status_chart.set_visibility(True)
@@ -156,8 +167,9 @@ class Monitor(Tab):
                         self._status_chart.update()
                     if self.host in fan_speed_history and len(fan_speed_history[self.host]) > 0 and last_status[self.host].status is True:
                         self._fan_chart.options["series"] = []
-                        for sensor, data in fan_speed_history[self.host].items():
-                            self._fan_chart.options["series"].append(dict({"name": sensor.title(), "data": list(data)}))
+                        history = fan_speed_history[self.host]
+                        for sensor in history.names:
+                            self._fan_chart.options["series"].append(dict({"name": sensor.title(), "data": history.chart(sensor, self.history_window)}))
                         self._fan_chart.set_visibility(True)
                         self._fan_chart.update()
                     else:
@@ -1,3 +1,6 @@
+import time
+
+start_time = time.perf_counter()
 import mylogging
 import logging
 
@@ -32,18 +35,23 @@ if __name__ in {"__main__", "__mp_main__"}:
 
     from hush import page, logo, control
     from hush.hardware.factory import Factory
+    from hush.interfaces.http import Http
+    from hush.interfaces.rmcp import Session
 
-    launcher = control.Launcher()
-    launcher_timer = ui.timer(1, launcher.run)
+    launcher = control.Launcher(max_concurrency=int(os.environ.get("MAX_CONCURRENT_HOSTS", 16)))
 
     async def on_shutdown() -> None:
         logger.info("Shutdown launcher...")
-        launcher_timer.cancel()
+        await launcher.stop()
         await launcher.wait_on_not_busy()
         logger.info("Closing drivers...")
         await Factory.close_all()
+        await Session.close_all()
+        await Http.close_all()
 
     app.on_startup(lambda: print(f"Starting hush, bound to the following addresses {', '.join(app.urls)}.", flush=True))
+    app.on_startup(launcher.start)
+    app.on_startup(lambda: logger.info(f"Fan control launcher started {time.perf_counter() - start_time:.2f}s after launch."))
     app.on_shutdown(on_shutdown)
     page.build()
     ui.run(title="hush", favicon="🙊", dark=True, reload=False, show=False, show_welcome_message=False)
@@ -0,0 +1,58 @@
+import struct
+import sys
+import pyghmi.ipmi.bmc as bmc
+
+# Stand-alone BMC for the rmcp tests and benchmark: pyghmi answers the RMCP+ handshake and session traffic,
+# this class only serves a small SDR repository and its sensor readings. Run as `python bmc.py <port>`.
+USERNAME = "admin"
+PASSWORD = "secret"
+
+
+def full_record(record_id: int, number: int, name: str, m: int = 1, b: int = 0, r_exp: int = 0, b_exp: int = 0, data_format: int = 0, sensor_type: int = 0x01) -> bytes:
+    # IPMI v2.0 table 43-1, indices are the spec's byte numbers minus one.
+    record = bytearray(48)
+    record[5] = 0x20
+    record[7] = number
+    record[12] = sensor_type
+    record[13] = 0x01
+    record[20] = data_format << 6
+    record[24] = m & 0xFF
+    record[25] = (m >> 8 & 0x03) << 6 | 0x05
+    record[26] = b & 0xFF
+    record[27] = (b >> 8 & 0x03) << 6 | 0x14
+    record[28] = 0x14
+    record[29] = (r_exp & 0x0F) << 4 | (b_exp & 0x0F)
+    record[47] = 0xC0 | len(name)
+    record += name.encode()
+    struct.pack_into("<HBBB", record, 0, record_id, 0x51, 0x01, len(record) - 5)
+    return bytes(record)
+
+
+RECORDS = [
+    full_record(1, 0x10, "CPU1 Temp"),
+    full_record(2, 0x11, "CPU2 Temp", data_format=2),
+    full_record(3, 0x20, "Inlet Temp", m=5, r_exp=-1),
+    full_record(4, 0x21, "Exhaust Temp", m=1, b=25, b_exp=-1),
+    full_record(5, 0x30, "FAN1", m=70, sensor_type=0x04),
+]
+READINGS = {0x10: 45, 0x11: 0xFB, 0x20: 230, 0x21: 38, 0x30: 100}
+EXPECTED = [("CPU1 Temp", 45.0), ("CPU2 Temp", -5.0), ("Inlet Temp", 115.0), ("Exhaust Temp", 40.5)]
+
+
+class Simulator(bmc.Bmc):
+    def handle_raw_request(self, request, session):
+        netfn, command, data = request["netfn"], request["command"], bytes(request["data"])
+        if netfn == 0x0A and command == 0x22:
+            return session.send_ipmi_response(data=[0x34, 0x12])
+        if netfn == 0x0A and command == 0x23:
+            _, record_id, offset, length = struct.unpack("<HHBB", data)
+            index = record_id - 1 if record_id > 0 else 0
+            following = index + 2 if index + 1 < len(RECORDS) else 0xFFFF
+            return session.send_ipmi_response(data=list(struct.pack("<H", following) + RECORDS[index][offset : offset + length]))
+        if netfn == 0x04 and command == 0x2D:
+            return session.send_ipmi_response(data=[READINGS[data[0]], 0x40, 0x00])
+        return super().handle_raw_request(request, session)
+
+
+if __name__ == "__main__":
+    Simulator({USERNAME: PASSWORD}, port=int(sys.argv[1]), address="127.0.0.1").listen()
@@ -0,0 +1,23 @@
+import asyncio
+import time
+from hush.interfaces import cli
+
+
+class First(cli.Parser):
+    def feed(self, line: str) -> None:
+        if line.startswith("Temperature:"):
+            self.data = float(line.split()[1])
+            self.done = True
+
+
+def test_parser_stops_command_once_done():
+    start = time.monotonic()
+    result = asyncio.run(cli.Cli().shell("echo a; echo 'Temperature: 33'; sleep 5", parser=First()))
+    assert result.data == 33.0
+    assert result.terminated is False
+    assert time.monotonic() - start < 4
+
+
+def test_find_all_reads_whole_output():
+    result = asyncio.run(cli.Cli().shell("printf 'Disk /dev/sda\\nDisk /dev/sdb\\n'", parser=cli.FindAll(r"Disk (/dev/sd[a-z]+)")))
+    assert result.data == ["/dev/sda", "/dev/sdb"]
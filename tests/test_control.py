@@ -0,0 +1,120 @@
+import asyncio
+from hush import hardware
+from hush.breaker import Breaker
+from hush.control import Adaptive, Machine, Plan, Read
+
+
+class Sensor(hardware.Device):
+    def __init__(self, host: str, temp: float) -> None:
+        super().__init__(host)
+        self.temp = temp
+        self.reads = 0
+
+    async def get_temp(self):
+        self.reads += 1
+        return self.temp
+
+
+class Control(hardware.Device):
+    def __init__(self, host: str) -> None:
+        super().__init__(host)
+        self.speeds = []
+
+    async def set_speed(self, speed) -> None:
+        self.speeds.append(speed)
+
+
+class Algorithm:
+    def __call__(self, temp):
+        return -temp
+
+
+def plan(control, control_breaker, reads):
+    breakers = {control_breaker: control}
+    for read in reads:
+        breakers.setdefault(read.breaker, read.driver)
+    return Plan(key=(), hosts=("host",), control=control, control_breaker=control_breaker, reads=tuple(reads), breakers=tuple(breakers.items()))
+
+
+def trip(breaker: Breaker) -> None:
+    for _ in range(Breaker.threshold):
+        breaker.failure()
+
+
+def test_open_sensor_breaker_does_not_block_speed_control():
+    Breaker.breakers.clear()
+    Machine.speeds.clear()
+    control = Control("host")
+    cpu = Sensor("host", 40)
+    drive = Sensor("shelf", 55)
+    drive_breaker = Breaker.get("shelf", "SMART All")
+    trip(drive_breaker)
+    machine = Machine("host", [])
+    reads = [
+        Read(host="host", sensor="cpu", driver=cpu, breaker=Breaker.get("host", "cpu"), algorithm=Algorithm()),
+        Read(host="shelf", sensor="drive", driver=drive, breaker=drive_breaker, algorithm=Algorithm()),
+    ]
+    admitted = asyncio.run(machine._admit(plan(control, Breaker.get("host", "speed"), reads)))
+    assert drive_breaker not in admitted
+    asyncio.run(machine._calc(plan(control, Breaker.get("host", "speed"), reads), tuple(r for r in reads if r.breaker in admitted)))
+    assert control.speeds == [40]
+    assert drive.reads == 0
+
+
+def test_open_control_breaker_blocks_cycle():
+    Breaker.breakers.clear()
+    control_breaker = Breaker.get("host", "speed")
+    trip(control_breaker)
+    read = Read(host="host", sensor="cpu", driver=Sensor("host", 40), breaker=Breaker.get("host", "cpu"))
+    assert asyncio.run(Machine("host", [])._admit(plan(Control("host"), control_breaker, [read]))) is None
+
+
+def test_partial_data_never_lowers_fan_speed():
+    Breaker.breakers.clear()
+    Machine.speeds.clear()
+    control = Control("host")
+    cpu = Sensor("host", 40)
+    drive = Sensor("shelf", 55)
+    reads = [
+        Read(host="host", sensor="cpu", driver=cpu, breaker=Breaker.get("host", "cpu"), algorithm=Algorithm()),
+        Read(host="shelf", sensor="drive", driver=drive, breaker=Breaker.get("shelf", "SMART All"), algorithm=Algorithm()),
+    ]
+    full = plan(control, Breaker.get("host", "speed"), reads)
+    machine = Machine("host", [])
+    asyncio.run(machine._calc(full, full.reads))
+    asyncio.run(machine._calc(full, full.reads[:1], partial=True))
+    cpu.temp = 70
+    asyncio.run(machine._calc(full, full.reads[:1], partial=True))
+    cpu.temp = 40
+    asyncio.run(machine._calc(full, full.reads))
+    assert control.speeds == [55, 55, 70, 55]
+
+
+CURVE = [30, 40, 50, 60, 70]
+
+
+def test_flat_temperature_on_breakpoint_polls_at_maximum():
+    Adaptive.trends.clear()
+    for temp in (40, 42, 50):
+        intervals = [Adaptive.interval(("host", f"cpu{temp}"), temp, t, CURVE, 10, 120) for t in range(0, 300, 30)]
+        assert intervals == [120.0] * len(intervals)
+
+
+def test_settling_onto_setpoint_relaxes_to_maximum():
+    Adaptive.trends.clear()
+    temps = [36, 38, 39, 40, 40, 40, 40, 40, 40, 40]
+    intervals = [Adaptive.interval(("host", "cpu"), temp, 10.0 * i, [40], 10, 120) for i, temp in enumerate(temps)]
+    assert intervals[2] < 30
+    assert intervals[-1] == 120.0
+
+
+def test_rising_toward_breakpoint_shortens_interval():
+    Adaptive.trends.clear()
+    Adaptive.interval(("host", "cpu"), 46, 0, CURVE, 10, 120)
+    rising = Adaptive.interval(("host", "cpu"), 48, 100, CURVE, 10, 120)
+    Adaptive.trends.clear()
+    Adaptive.interval(("host", "cpu"), 50, 0, CURVE, 10, 120)
+    falling = Adaptive.interval(("host", "cpu"), 48, 100, CURVE, 10, 120)
+    assert rising < falling
+    Adaptive.clear("host")
+    assert Adaptive.trends == {}
@@ -0,0 +1,64 @@
+import asyncio
+from hush import hardware, storage
+from hush.hardware.factory import DriverSpec, Factory
+
+
+class Bmc(hardware.Device):
+    def __init__(self, host: str) -> None:
+        super().__init__(host)
+        self.closed = 0
+        self.released = 0
+
+    async def close(self) -> None:
+        self.closed += 1
+
+    async def release(self) -> None:
+        self.released += 1
+
+
+class Spec(DriverSpec):
+    async def build(self, host, kwargs):
+        return Bmc(host)
+
+
+def setup(monkeypatch):
+    monkeypatch.setattr(Factory, "registry", {("speed", "Bmc"): Spec("bmc", "Bmc"), ("cpu", "Bmc"): Spec("bmc", "Bmc")})
+    monkeypatch.setattr(Factory, "drivers", {})
+    monkeypatch.setattr(Factory, "instances", {})
+    storage.host("host")["speed"] = "Bmc"
+    storage.host("host")["cpu"] = "Bmc"
+
+
+def test_groups_share_one_instance_closed_once(monkeypatch):
+    setup(monkeypatch)
+
+    async def run():
+        speed = await Factory.driver("host", "speed")
+        cpu = await Factory.driver("host", "cpu")
+        assert speed is cpu
+        await Factory.close("host", "cpu")
+        assert (speed.closed, speed.released) == (0, 0)
+        await Factory.close("host", "speed")
+        assert (speed.closed, speed.released) == (1, 1)
+
+    asyncio.run(run())
+
+
+def test_closing_speed_rebuilds_the_shared_instance(monkeypatch):
+    setup(monkeypatch)
+
+    async def run():
+        speed = await Factory.driver("host", "speed")
+        await Factory.driver("host", "cpu")
+        version = storage.version("host")
+        await Factory.close("host", "speed")
+        assert (speed.closed, speed.released) == (1, 1)
+        assert storage.version("host") > version
+        cpu = await Factory.driver("host", "cpu")
+        assert cpu is not speed
+        assert await Factory.driver("host", "speed") is cpu
+        await Factory.remove_host("host")
+        assert (speed.closed, speed.released) == (1, 1)
+        assert (cpu.closed, cpu.released) == (1, 1)
+
+    asyncio.run(run())
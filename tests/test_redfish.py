@@ -0,0 +1,122 @@
+import asyncio
+import base64
+import httpx
+import pytest
+from hush.interfaces.http import Http, Redfish
+
+HOST = "bmc.test"
+ENDPOINT = f"https://{HOST}"
+BASIC = "Basic " + base64.b64encode(b"admin:secret").decode()
+
+
+class FakeBmc:
+    def __init__(self, sessions: bool = True) -> None:
+        self.sessions = sessions
+        self.tokens = set()
+        self.logins = 0
+        self.deleted = []
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path, token = request.url.path, request.headers.get("X-Auth-Token", None)
+        if request.method == "POST" and path == "/redfish/v1/SessionService/Sessions":
+            if self.sessions is False:
+                return httpx.Response(405)
+            self.logins += 1
+            token = f"token-{self.logins}"
+            self.tokens.add(token)
+            return httpx.Response(201, headers={"X-Auth-Token": token, "Location": f"/redfish/v1/SessionService/Sessions/{self.logins}"})
+        if request.method == "DELETE":
+            self.deleted.append(path)
+            self.tokens.discard(token)
+            return httpx.Response(204)
+        if token not in self.tokens and request.headers.get("Authorization", None) != BASIC:
+            return httpx.Response(401)
+        if path == "/redfish/v1/SessionService":
+            return httpx.Response(200, json={"SessionTimeout": 100})
+        return httpx.Response(200, json={"Name": path, "Accept": request.headers.get("Accept", None)})
+
+
+@pytest.fixture
+def bmc():
+    fake = FakeBmc()
+    Http.clients[ENDPOINT] = {"client": httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)), "refs": 0}
+    yield fake
+    Http.clients.clear()
+    Redfish.sessions.clear()
+
+
+def test_login_is_shared_and_logged_out_on_last_close(bmc):
+    async def run():
+        first, second = Redfish(HOST, "admin", "secret"), Redfish(HOST, "admin", "secret")
+        assert (await first.get("Systems"))["Name"] == "/redfish/v1/Systems"
+        assert (await second.get("Chassis"))["Name"] == "/redfish/v1/Chassis"
+        assert bmc.logins == 1
+        assert first.session["timeout"] == 100
+        await first.close()
+        assert bmc.deleted == []
+        await second.close()
+        assert bmc.deleted == ["/redfish/v1/SessionService/Sessions/1"]
+
+    asyncio.run(run())
+
+
+def test_session_is_renewed_before_expiry(bmc):
+    async def run():
+        redfish = Redfish(HOST, "admin", "secret")
+        await redfish.get("Systems")
+        redfish.session["last_used"] -= 90
+        await redfish.get("Systems")
+        assert bmc.logins == 2
+        assert bmc.deleted == ["/redfish/v1/SessionService/Sessions/1"]
+        assert bmc.requests[-1].headers["X-Auth-Token"] == "token-2"
+        await redfish.close()
+
+    asyncio.run(run())
+
+
+def test_rejected_token_logs_in_once(bmc):
+    async def run():
+        redfish = Redfish(HOST, "admin", "secret")
+        await redfish.get("Systems")
+        bmc.tokens.clear()
+        response = await redfish.request("GET", "Systems", headers={"Accept": "application/json"})
+        assert response.status_code == 200
+        assert response.json()["Accept"] == "application/json"
+        assert bmc.logins == 2
+        await redfish.close()
+
+    asyncio.run(run())
+
+
+def test_refused_session_falls_back_to_basic_auth(bmc):
+    bmc.sessions = False
+
+    async def run():
+        first, second = Redfish(HOST, "admin", "secret"), Redfish(HOST, "admin", "secret")
+        response = await first.request("GET", "Systems", headers={"Accept": "application/json"})
+        assert response.json()["Accept"] == "application/json"
+        assert response.request.headers["Authorization"] == BASIC
+        await second.get("Systems")
+        await first.get("Systems")
+        assert [request.method for request in bmc.requests] == ["POST", "GET", "GET", "GET"]
+        await first.close()
+        await second.close()
+        assert bmc.deleted == []
+
+    asyncio.run(run())
+
+
+def test_rejected_token_falls_back_with_caller_headers(bmc):
+    async def run():
+        redfish = Redfish(HOST, "admin", "secret")
+        await redfish.get("Systems")
+        bmc.tokens.clear()
+        bmc.sessions = False
+        response = await redfish.request("GET", "Systems", headers={"Accept": "application/json"})
+        assert response.json()["Accept"] == "application/json"
+        assert response.request.headers["Authorization"] == BASIC
+        await redfish.close()
+
+    asyncio.run(run())
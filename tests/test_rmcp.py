@@ -0,0 +1,65 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from hush.interfaces import rmcp
+
+pytest.importorskip("pyghmi.ipmi.bmc")
+pytest.importorskip("cryptography")
+import bmc  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    port = free_port()
+    process = subprocess.Popen([sys.executable, bmc.__file__, str(port)], cwd=os.path.dirname(bmc.__file__))
+    time.sleep(1)
+    yield port
+    process.kill()
+    process.wait()
+
+
+def test_parse_reads_exponents_from_byte_30():
+    record = rmcp.SensorRecord.parse(bmc.full_record(1, 0x10, "CPU1 Temp", m=5, r_exp=-1, b_exp=2))
+    assert (record.r_exp, record.b_exp) == (-1, 2)
+    record = rmcp.SensorRecord.parse(bmc.RECORDS[0])
+    assert (record.name, record.r_exp, record.b_exp) == ("CPU1 Temp", 0, 0)
+    assert record.convert(45) == 45.0
+
+
+def test_session_reads_sdr(simulator):
+    async def run():
+        session = rmcp.Session("127.0.0.1", bmc.USERNAME, bmc.PASSWORD, port=simulator)
+        try:
+            await session.connect()
+            assert session.connected is True
+            assert len(session._k2) == 16
+            assert len(await session.records()) == len(bmc.RECORDS)
+            assert await session.sdr(sensor_type=rmcp.SENSOR_TYPE_TEMPERATURE) == bmc.EXPECTED
+            assert await session.sdr(sensor_type=rmcp.SENSOR_TYPE_TEMPERATURE) == bmc.EXPECTED
+        finally:
+            await session.close()
+
+    asyncio.run(run())
+
+
+def test_session_rejects_wrong_password(simulator):
+    async def run():
+        session = rmcp.Session("127.0.0.1", bmc.USERNAME, "wrong", port=simulator, timeout=0.5, retries=1)
+        try:
+            with pytest.raises((rmcp.IpmiError, TimeoutError)):
+                await session.connect()
+            assert session.connected is False
+        finally:
+            await session.close()
+
+    asyncio.run(run())
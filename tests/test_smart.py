@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from hush.hardware.smart import Smart
+
+
+class FakeSmart(Smart):
+    def __init__(self, temps) -> None:
+        self.temps = temps
+        super().__init__("nas", drives=["/dev/sda", "/dev/sdb"], standby=True)
+
+    def get_os_credentials(self) -> None:
+        pass
+
+    async def get_drive_temps(self, drive_paths):
+        if isinstance(self.temps, Exception):
+            raise self.temps
+        return self.temps
+
+
+@pytest.mark.parametrize("temps", [{}, ConnectionError("ssh exited with 255")])
+def test_empty_or_failed_batch_raises(temps):
+    with pytest.raises(Exception):
+        asyncio.run(FakeSmart(temps).get_temp())
+
+
+def test_sleeping_drives_fall_back_to_last_reading():
+    smart = FakeSmart({"/dev/sda": None, "/dev/sdb": None})
+    assert asyncio.run(smart.get_temp()) == Smart.standby_temp
+    smart.temps = {"/dev/sda": 38.0, "/dev/sdb": 41.0}
+    assert asyncio.run(smart.get_temp()) == 41
+    smart.temps = {"/dev/sda": None, "/dev/sdb": None}
+    assert asyncio.run(smart.get_temp()) == 38
+    smart.temps = {}
+    with pytest.raises(ValueError):
+        asyncio.run(smart.get_temp())
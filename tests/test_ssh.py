@@ -0,0 +1,29 @@
+import asyncio
+import threading
+from hush.interfaces.ssh import ConfigStore
+
+
+def test_change_during_flush_is_written(tmp_path):
+    store = ConfigStore(str(tmp_path / "config"))
+    writing, release = threading.Event(), threading.Event()
+    write = store._write
+
+    def slow_write(text: str) -> None:
+        writing.set()
+        release.wait(5)
+        write(text)
+
+    store._write = slow_write
+
+    async def run():
+        store.hosts["first"] = {"HostName": "10.0.0.1"}
+        store.save()
+        await asyncio.to_thread(writing.wait, 5)
+        store.hosts["second"] = {"HostName": "10.0.0.2"}
+        store.save()
+        release.set()
+        await store._task
+
+    asyncio.run(run())
+    assert (tmp_path / "config").read_text() == store.render()
+    assert "Host second" in store.render()